@@ -0,0 +1,43 @@
+"""
+Peak memory of assembling the global stiffness, dense against sparse.
+Usage: python benchmark/memory_sparse.py
+"""
+import time
+import tracemalloc
+
+from meshes import load_mesh
+from naivefea.analysis import LinearFea
+from naivefea.constitutive import LinearElastic
+
+DENSE_LIMIT=10000 # skip dense assembly above this number of DOF
+
+
+def measure(mesh,sparse):
+    fea=LinearFea(mesh)
+    fea.set_sparse(sparse)
+    fea.uniform_material(LinearElastic(10.0,0.3))
+    tracemalloc.start()
+    start=time.perf_counter()
+    fea.init_global_system()
+    seconds=time.perf_counter()-start
+    _,peak=tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak,seconds
+
+def main():
+    print(f"{'mesh':<12}{'level':>6}{'nodes':>9}{'elements':>10}{'dense MB':>12}{'sparse MB':>12}{'sparse s':>10}")
+    for name in ('abaqus_mesh','enhanced'):
+        for levels in range(5):
+            mesh=load_mesh(name,levels)
+            len_dof=2*len(mesh.points)
+            if len_dof<=DENSE_LIMIT:
+                dense=f'{measure(mesh,False)[0]/2**20:.1f}'
+            else:
+                dense=f'~{8*len_dof**2/2**20:.0f}'
+            peak,seconds=measure(mesh,True)
+            elements=len(mesh.cells_dict['triangle'])
+            print(f'{name:<12}{levels:>6}{len(mesh.points):>9}{elements:>10}{dense:>12}{peak/2**20:>12.1f}{seconds:>10.2f}')
+
+
+if __name__=='__main__':
+    main()
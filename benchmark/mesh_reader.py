@@ -0,0 +1,50 @@
+"""
+Throughput of reading Abaqus input files, naivefea.mesh against meshio.
+Refined versions of the bundled enhanced.inp are written to a temporary directory.
+Usage: python benchmark/mesh_reader.py
+"""
+import os
+import tempfile
+import time
+
+import meshio
+from meshes import load_mesh
+from naivefea import mesh as naive_mesh
+
+MESHIO_LIMIT=2000000 # skip meshio above this number of lines
+
+
+def write_inp(mesh,filename):
+    with open(filename,'w') as file:
+        file.write('*Heading\n*Node\n')
+        for label,(x,y) in enumerate(mesh.points,1):
+            file.write(f'{label:8d},{x:16.8e},{y:16.8e}\n')
+        file.write('*Element, type=CPS3, elset=all\n')
+        for label,(a,b,c) in enumerate(mesh.cells_dict['triangle']+1,1):
+            file.write(f'{label:8d},{a:8d},{b:8d},{c:8d}\n')
+        file.write(f'*Nset, nset=all, generate\n1,{len(mesh.points)},1\n')
+
+def measure(reader,filename):
+    start=time.perf_counter()
+    reader(filename)
+    return time.perf_counter()-start
+
+def main():
+    print(f"{'level':>6}{'lines':>10}{'MB':>8}{'naivefea s':>12}{'lines/s':>12}{'meshio s':>10}{'lines/s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for levels in range(2,7):
+            filename=os.path.join(directory,f'enhanced_{levels}.inp')
+            write_inp(load_mesh('enhanced',levels),filename)
+            with open(filename) as file:
+                lines=sum(1 for _ in file)
+            size=os.path.getsize(filename)/2**20
+            seconds=measure(naive_mesh.read,filename)
+            row=f'{levels:>6}{lines:>10}{size:>8.1f}{seconds:>12.3f}{lines/seconds:>12.0f}'
+            if lines<=MESHIO_LIMIT:
+                seconds=measure(meshio.read,filename)
+                row+=f'{seconds:>10.3f}{lines/seconds:>12.0f}'
+            print(row)
+
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Scaled-up versions of the bundled meshes for benchmarking."""
+import os
+import sys
+
+import numpy as np
+import meshio
+
+ROOT=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,ROOT)
+
+
+def refine_mesh(mesh,levels=1):
+    """Split every triangle into four by its edge midpoints, repeated `levels` times."""
+    points=mesh.points[:,:2]
+    elements=mesh.cells_dict['triangle']
+    for _ in range(levels):
+        points,elements=split_triangles(points,elements)
+    return meshio.Mesh(points,[('triangle',elements)])
+
+def split_triangles(points,elements):
+    edges=np.concatenate([elements[:,[0,1]],elements[:,[1,2]],elements[:,[2,0]]])
+    edges=np.sort(edges,axis=1)
+    unique_edges,edge_index=np.unique(edges,axis=0,return_inverse=True)
+    midpoints=0.5*(points[unique_edges[:,0]]+points[unique_edges[:,1]])
+    mid=len(points)+edge_index.reshape(3,-1)
+    a,b,c=elements.T
+    ab,bc,ca=mid
+    new_elements=np.concatenate([
+        np.stack([a,ab,ca],axis=1),
+        np.stack([ab,b,bc],axis=1),
+        np.stack([ca,bc,c],axis=1),
+        np.stack([ab,bc,ca],axis=1)])
+    return np.concatenate([points,midpoints]),new_elements
+
+def load_mesh(name,levels=0):
+    """load a bundled .inp mesh (name without suffix) and refine it."""
+    return refine_mesh(meshio.read(os.path.join(ROOT,f'{name}.inp')),levels)
@@ -0,0 +1,45 @@
+"""
+Wall time of one nonlinear forward() (element calculation and assembly) on 1 to N processors.
+Usage: python benchmark/parallel_scaling.py [levels]
+"""
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from meshes import load_mesh
+from naivefea.analysis import OneStepFea
+from naivefea.constitutive import TensorHookean
+
+
+def measure(mesh,processor_number,repeat=3):
+    fea=OneStepFea(mesh)
+    fea.set_sparse()
+    fea.set_parallel(processor_number)
+    fea.uniform_material(TensorHookean(10.0,100.0))
+    fea.init_global_system()
+    fea.deform=1e-3*np.random.default_rng(0).standard_normal(fea.deform.shape)
+    seconds=list()
+    for _ in range(repeat):
+        fea.zero_global_K()
+        fea.zero_global_force()
+        start=time.perf_counter()
+        fea.forward()
+        seconds.append(time.perf_counter()-start)
+    return min(seconds),fea.K
+
+def main():
+    levels=int(sys.argv[1]) if len(sys.argv)>1 else 3
+    mesh=load_mesh('enhanced',levels)
+    print(f"{len(mesh.cells_dict['triangle'])} elements")
+    print(f"{'processors':>10}{'seconds':>10}{'speedup':>10}{'same K':>8}")
+    serial,K_serial=measure(mesh,1)
+    for processor_number in range(1,multiprocessing.cpu_count()+1):
+        seconds,K=measure(mesh,processor_number)
+        same=abs(K-K_serial).max()==0.0
+        print(f'{processor_number:>10}{seconds:>10.3f}{serial/seconds:>10.2f}{str(same):>8}')
+
+
+if __name__=='__main__':
+    main()
@@ -1,9 +1,10 @@
-from . import constitutive,element,analysis
+from . import constitutive,element,analysis,mesh
 from .helper import *
 
 __all__=[ 
     'constitutive',
     'element',
     'analysis',
+    'mesh',
     'plot_mesh'
 ]
\ No newline at end of file
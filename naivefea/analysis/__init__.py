@@ -1,4 +1,7 @@
-from .fea import LinearFea,OneStepFea
+from .fea import LinearFea,OneStepFea,IncrementalFea
+from .derived import register_field
 
 __all__=['LinearFea',
-'OneStepFea']
+'OneStepFea',
+'IncrementalFea',
+'register_field']
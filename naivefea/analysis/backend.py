@@ -0,0 +1,161 @@
+import inspect
+import warnings
+
+import numpy as np
+import scipy.linalg
+from scipy import sparse
+from scipy.sparse import linalg as sparse_linalg
+
+# the relative tolerance of cg is rtol since scipy 1.12, tol before
+CG_TOL='rtol' if 'rtol' in inspect.signature(sparse_linalg.cg).parameters else 'tol'
+
+
+class CommonSolver:
+    """
+    Solver of the reduced system K*x=f.
+    Factorize K once, then solve it for any right hand side f.
+    After solving, iterations, residual (relative) and converged (False if an iterative solver failed) are reported.
+    """
+    def __init__(self,**options):
+        self.options=options
+        self.iterations=0
+        self.residual=0.0
+        self.converged=True
+
+    def factorize(self,K):
+        self.K=K
+
+    def solve(self,f):
+        x=self.cal_solution(f)
+        self.residual=self.cal_residual(f,x)
+        return x
+
+    def cal_solution(self,f):
+        return np.zeros_like(f)
+
+    @property
+    def factor_nnz(self):
+        """stored entries of the factorization of K, None if K is not factorized."""
+        return None
+
+    def cal_residual(self,f,x):
+        norm_f=np.linalg.norm(f)
+        if norm_f==0.0: return 0.0
+        return np.linalg.norm(f-self.K@x)/norm_f
+
+    def as_dense(self,K):
+        return K.toarray() if sparse.issparse(K) else np.asarray(K)
+
+    def as_sparse(self,K):
+        return sparse.csc_matrix(K)
+
+
+class DenseSolver(CommonSolver):
+    """LU factorization of dense matrix, the default for dense assembly."""
+    def factorize(self,K):
+        self.K=self.as_dense(K)
+        self.__lu=scipy.linalg.lu_factor(self.K)
+
+    def cal_solution(self,f):
+        return scipy.linalg.lu_solve(self.__lu,f)
+
+    @property
+    def factor_nnz(self):
+        return self.K.shape[0]**2
+
+
+class SparseLUSolver(CommonSolver):
+    """Sparse LU factorization (SuperLU), the default for sparse assembly."""
+    def factorize(self,K):
+        self.K=self.as_sparse(K)
+        self.__lu=sparse_linalg.splu(self.K,**self.options)
+
+    def cal_solution(self,f):
+        return self.__lu.solve(f)
+
+    @property
+    def factor_nnz(self):
+        return self.__lu.L.nnz+self.__lu.U.nnz
+
+
+class CholeskySolver(CommonSolver):
+    """
+    Factorization for symmetric positive definite K.
+    Dense K uses Cholesky factorization,
+    sparse K uses SuperLU in symmetric mode with minimum degree ordering on K+K^T,
+    which pivots on the diagonal like Cholesky (LDL^T) does.
+    """
+    def factorize(self,K):
+        self.dense=not sparse.issparse(K)
+        if self.dense:
+            self.K=np.asarray(K)
+            self.__factor=scipy.linalg.cho_factor(self.K)
+        else:
+            self.K=self.as_sparse(K)
+            self.__factor=sparse_linalg.splu(self.K,permc_spec='MMD_AT_PLUS_A',
+                diag_pivot_thresh=0.0,options={'SymmetricMode':True})
+
+    def cal_solution(self,f):
+        if self.dense: return scipy.linalg.cho_solve(self.__factor,f)
+        return self.__factor.solve(f)
+
+    @property
+    def factor_nnz(self):
+        if self.dense: return self.K.shape[0]*(self.K.shape[0]+1)//2
+        return self.__factor.L.nnz+self.__factor.U.nnz
+
+
+class CGSolver(CommonSolver):
+    """
+    Preconditioned conjugate gradient for symmetric positive definite K.
+    options: preconditioner='jacobi', 'ilu' or None; rtol=1e-10; maxiter=None;
+    drop_tol and fill_factor are passed to the ILU preconditioner.
+    """
+    def __init__(self,preconditioner='jacobi',rtol=1e-10,maxiter=None,**options):
+        super().__init__(**options)
+        self.preconditioner=preconditioner
+        self.rtol=rtol
+        self.maxiter=maxiter
+
+    def factorize(self,K):
+        self.K=self.as_sparse(K).tocsr()
+        self.M=self.__cal_preconditioner()
+
+    def __cal_preconditioner(self):
+        if self.preconditioner is None:
+            return None
+        elif self.preconditioner=='jacobi':
+            return sparse.diags(1.0/self.K.diagonal())
+        elif self.preconditioner=='ilu':
+            ilu=sparse_linalg.spilu(self.K.tocsc(),**self.options)
+            return sparse_linalg.LinearOperator(self.K.shape,ilu.solve)
+        else:
+            raise ValueError(f'unknown preconditioner: {self.preconditioner}')
+
+    def cal_solution(self,f):
+        """each column of f is solved in turn, iterations are summed; a RuntimeWarning is given if CG fails."""
+        self.iterations=0
+        self.converged=True
+        if f.ndim==2: return np.stack([self.__cal_column(column) for column in f.T],axis=1)
+        return self.__cal_column(f)
+
+    def __cal_column(self,f):
+        iterations=self.iterations
+        x,info=sparse_linalg.cg(self.K,f,atol=0.0,maxiter=self.maxiter,
+            M=self.M,callback=self.__count_iteration,**{CG_TOL:self.rtol})
+        if info!=0:
+            self.converged=False
+            warnings.warn(f'CG did not converge after {self.iterations-iterations} iterations, '
+                f'relative residual {self.cal_residual(f,x):.2e}',RuntimeWarning)
+        return x
+
+    def __count_iteration(self,x):
+        self.iterations+=1
+
+
+SOLVERS={
+    'dense':DenseSolver,
+    'lu':SparseLUSolver,
+    'cholesky':CholeskySolver,
+    'cg':CGSolver
+}
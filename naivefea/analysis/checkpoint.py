@@ -0,0 +1,137 @@
+import pickle
+import struct
+import zipfile
+
+import numpy as np
+
+from . import kernel
+from ..mesh import Mesh
+
+MMAP_BYTES=1<<20 # smaller members are read into memory instead of memory-mapped
+SHOW_KEYS={'position':('x','y'),'deform':('Ux','Uy'),'force':('Fx','Fy'),
+    'strain':('e11','e22','e12'),'stress':('S11','S22','S12')}
+
+
+def save_arrays(path,arrays):
+    """write arrays into an uncompressed .npz, so that every member can be memory-mapped."""
+    np.savez(path,**arrays)
+
+def load_arrays(path,mmap=True):
+    """
+    read all arrays of an .npz file.
+    If mmap, members larger than MMAP_BYTES are read-only memory maps into the file.
+    """
+    with np.load(path) as data:
+        if not mmap: return {name:data[name] for name in data.files}
+        arrays=dict()
+        with zipfile.ZipFile(path) as archive,open(path,'rb') as file:
+            for info in archive.infolist():
+                name=info.filename[:-4]
+                if info.file_size<MMAP_BYTES or info.compress_type!=zipfile.ZIP_STORED:
+                    arrays[name]=data[name]
+                else:
+                    arrays[name]=_map_member(path,file,info)
+    return arrays
+
+def _map_member(path,file,info):
+    file.seek(info.header_offset)
+    name_length,extra_length=struct.unpack('<HH',file.read(30)[26:30])
+    file.seek(info.header_offset+30+name_length+extra_length)
+    version=np.lib.format.read_magic(file)
+    if version==(1,0): shape,fortran_order,dtype=np.lib.format.read_array_header_1_0(file)
+    else: shape,fortran_order,dtype=np.lib.format.read_array_header_2_0(file)
+    return np.memmap(path,dtype=dtype,mode='r',offset=file.tell(),shape=shape,
+        order='F' if fortran_order else 'C')
+
+
+class CheckpointProcessor(kernel.ReducedSystem):
+    """
+    Save the model (mesh, sets, materials, conditions) and its result into one .npz file,
+    and load it back without assembling or solving again.
+    """
+    def save(self,path):
+        """save model and result (if submitted) to path (.npz)."""
+        arrays={'nodes':self.nodes,'elements':self.elements,'material_index':self.material_index,
+            'sparse':np.array(self.sparse)}
+        arrays.update(self.__get_material_arrays())
+        for name,indexes in self.node_sets.items(): arrays[f'node_set/{name}']=indexes
+        for name,indexes in self.element_sets.items(): arrays[f'element_set/{name}']=indexes
+        if self.node_map is not None: arrays.update(original_index=self.original_index,node_map=self.node_map)
+        arrays.update(self.__get_condition_arrays())
+        if hasattr(self,'deform'): arrays.update(self.__get_result_arrays())
+        save_arrays(path,arrays)
+
+    def __get_material_arrays(self):
+        try:
+            materials=pickle.dumps(self.materials)
+        except (pickle.PicklingError,AttributeError,TypeError):
+            return {'material_names':np.array([material.name for material in self.materials])}
+        return {'materials':np.frombuffer(materials,dtype=np.uint8)}
+
+    def __get_condition_arrays(self):
+        """conditions as (global deform index, value) arrays."""
+        fixed_index=np.flatnonzero(self.deform_fixed)
+        arrays={'deform_given/index':fixed_index,'deform_given/values':self.deform_given[fixed_index]}
+        for name in ('force_given','distributed_force'):
+            force=getattr(self,name)
+            arrays[f'{name}/index']=np.flatnonzero(force)
+            arrays[f'{name}/values']=force[arrays[f'{name}/index']]
+        return arrays
+
+    def __get_result_arrays(self):
+        arrays={'solved':np.array(self.solved),'deform':self.deform,'force':self.force,
+            'strain':self.strain,'stress':self.stress}
+        for name,components in self.current_dict.items():
+            for component,data in components.items():
+                if component in SHOW_KEYS.get(name,()) or not isinstance(data,np.ndarray): continue
+                arrays[f'current/{name}/{component}']=data
+        return arrays
+
+    @classmethod
+    def load(cls,path,mmap=True):
+        """
+        load an analysis saved by save.
+        If mmap, large arrays (nodes, elements, results) are memory-mapped read only.
+        Materials are unpickled, so only load files from a trusted source.
+        """
+        arrays=load_arrays(path,mmap)
+        fea=cls(Mesh(arrays['nodes'],{'triangle':arrays['elements']},
+            cls.__get_sets(arrays,'node_set/'),cls.__get_sets(arrays,'element_set/')))
+        fea.set_sparse(bool(arrays['sparse']))
+        if 'node_map' in arrays: fea.original_index,fea.node_map=arrays['original_index'],arrays['node_map']
+        fea.__set_materials(arrays)
+        fea.__set_conditions(arrays)
+        if 'deform' in arrays: fea.__set_results(arrays)
+        return fea
+
+    @staticmethod
+    def __get_sets(arrays,prefix):
+        return {name[len(prefix):]:data for name,data in arrays.items() if name.startswith(prefix)}
+
+    def __set_materials(self,arrays):
+        if 'materials' not in arrays:
+            print(f"Materials {arrays['material_names'].tolist()} are not saved, please assign them again.")
+            return
+        materials=pickle.loads(np.asarray(arrays['materials']).tobytes())
+        material_index=np.asarray(arrays['material_index'])
+        for index,material in enumerate(materials):
+            self.assign_material(material,np.flatnonzero(material_index==index))
+
+    def __set_conditions(self,arrays):
+        fixed_index=arrays['deform_given/index']
+        self.deform_fixed[fixed_index]=True
+        self.deform_given[fixed_index]=arrays['deform_given/values']
+        self.force_given[arrays['force_given/index']]=arrays['force_given/values']
+        self.distributed_force[arrays['distributed_force/index']]=arrays['distributed_force/values']
+
+    def __set_results(self,arrays):
+        self.solved=bool(arrays['solved'])
+        self.deform=arrays['deform']
+        self.force=arrays['force']
+        self.strain=arrays['strain']
+        self.stress=arrays['stress']
+        self.update_show_dict()
+        for name,data in arrays.items():
+            if not name.startswith('current/'): continue
+            _,show_name,component=name.split('/',2)
+            self.current_dict.setdefault(show_name,dict())[component]=data
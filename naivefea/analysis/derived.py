@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class DerivedFields(dict):
+    """
+    Show data of one kind (e.g. 'stress') in current_dict.
+    A derived component is calculated by the function registered in DERIVED_FIELDS
+    on its first access, and kept until the show dict is updated by the next submit.
+    """
+    def __init__(self,fea,kind):
+        super().__init__()
+        self.fea=fea
+        self.kind=kind
+
+    def __missing__(self,component):
+        fields=DERIVED_FIELDS.get(self.kind,dict())
+        function=fields.get(component,fields.get(None))
+        if function is None: raise KeyError(component)
+        self.update(function(self.fea,component))
+        return dict.__getitem__(self,component)
+
+
+def register_field(kind,components,function):
+    """
+    Register derived components of current_dict[kind].
+    function(fea,component) returns {component: ndarray} and may return several components at once,
+    components=None registers function for any component of this kind.
+    """
+    fields=DERIVED_FIELDS.setdefault(kind,dict())
+    for component in [None] if components is None else components:
+        fields[component]=function
+
+def cal_principal(a11,a22,a12):
+    """principal values (larger first) and angle (rad) of the first direction, of symmetric 2x2 tensors."""
+    center=0.5*(a11+a22)
+    radius=np.sqrt((0.5*(a11-a22))**2+a12**2)
+    return center+radius,center-radius,0.5*np.arctan2(2.0*a12,a11-a22)
+
+
+# stress, the out-of-plane S33 is given by the materials (0 in plane stress or if not overridden, see cal_S33_batch)
+def _stress_principal(fea,component):
+    S1,S2,angle=cal_principal(*fea.stress.T)
+    return {'S1':S1,'S2':S2,'Sangle':angle}
+
+def _stress_out_of_plane(fea,component):
+    S33=np.zeros(len(fea.elements))
+    for material,element_indexes in fea.material_groups:
+        S33[element_indexes]=material.cal_S33_batch(fea.strain[element_indexes],fea.stress[element_indexes])
+    return {'S33':S33}
+
+def _stress_invariants(fea,component):
+    s11,s22,s12=fea.stress.T
+    stress=fea.current_dict['stress']
+    s33=stress['S33']
+    principal=np.stack([stress['S1'],stress['S2'],s33])
+    return {'Mises':np.sqrt(0.5*((s11-s22)**2+(s22-s33)**2+(s33-s11)**2)+3*s12**2),
+        'Tresca':principal.max(axis=0)-principal.min(axis=0),
+        'pressure':-(s11+s22+s33)/3.0}
+
+# strain (e12 is engineering shear strain)
+def _strain_principal(fea,component):
+    e1,e2,angle=cal_principal(fea.strain[:,0],fea.strain[:,1],0.5*fea.strain[:,2])
+    return {'e1':e1,'e2':e2,'eangle':angle}
+
+def _strain_equivalent(fea,component):
+    e11,e22,e12=fea.strain.T
+    return {'eeq':np.sqrt(2.0/3.0*(e11**2+e22**2+0.5*e12**2))}
+
+def _strain_energy_density(fea,component):
+    return {'SED':0.5*np.einsum('ei,ei->e',fea.stress,fea.strain)}
+
+# reaction force, internal minus external nodal force on fixed degrees of freedom
+def _reaction(fea,component):
+    external=fea.force_given+fea.distributed_force
+    reaction=(fea.force-external).reshape(-1,2)*_fixed_mask(fea)
+    return {'RFx':reaction[:,0],'RFy':reaction[:,1]}
+
+def _fixed_mask(fea):
+    return fea.deform_fixed.reshape(-1,2).astype(np.float64)
+
+def _reaction_sum(fea,node_set):
+    """sum of reaction force (RFx,RFy) on a named node set."""
+    nodes=fea.get_node_set(node_set)
+    reaction=fea.current_dict['reaction']
+    return {node_set:np.array([reaction['RFx'][nodes].sum(),reaction['RFy'][nodes].sum()])}
+
+# element data averaged on nodes
+def _nodal_average(fea,component,kind):
+    return {component:fea.cal_nodal_average(fea.current_dict[kind][component])}
+
+
+DERIVED_FIELDS=dict() #kind:{component:function}
+register_field('stress',('S1','S2','Sangle'),_stress_principal)
+register_field('stress',('S33',),_stress_out_of_plane)
+register_field('stress',('Mises','Tresca','pressure'),_stress_invariants)
+register_field('strain',('e1','e2','eangle'),_strain_principal)
+register_field('strain',('eeq',),_strain_equivalent)
+register_field('energy',('SED',),_strain_energy_density)
+register_field('reaction',('RFx','RFy'),_reaction)
+register_field('reaction_sum',None,_reaction_sum)
+register_field('nodal_strain',None,lambda fea,component:_nodal_average(fea,component,'strain'))
+register_field('nodal_stress',None,lambda fea,component:_nodal_average(fea,component,'stress'))
@@ -1,13 +1,14 @@
 from .processor import PreProcessor,PostProcessor,PlotProcessor
-from .solver import LinearSolver,OneStepSolver
+from .solver import LinearSolver,OneStepSolver,IncrementalSolver
+from .checkpoint import CheckpointProcessor
 
 
-class LinearFea(LinearSolver,PreProcessor,PostProcessor,PlotProcessor):
+class LinearFea(LinearSolver,PreProcessor,PostProcessor,PlotProcessor,CheckpointProcessor):
     """
     The simplest analysis, suits for linear material and only has one increment. 
     Firstly, set the boundary condition;
     Secondly, submit the task;
-    Finally, view or plot the result.
+    Finally, view or plot the result, or save it (fea.save(path), LinearFea.load(path)).
     """
     def __init__(self, mesh):
         super().__init__(mesh)
@@ -17,11 +18,23 @@ class LinearFea(LinearSolver,PreProcessor,PostProcessor,PlotProcessor):
         self.preprocess()
         self.slove()
         if postprocess:
-            self.forward()
+            self.zero_global_force()
+            self.forward(tangent=False)
             self.update_show_dict()
 
+    def submit_cases(self,force_cases):
+        """
+        Solve many load cases with the same material and deform conditions.
+        force_cases is a list of f_given (instead of the one set by set_force_conditions),
+        or ndarray(shape=(n_cases,2N)) of nodal force; body force and edge traction apply to every case.
+        Return deform of each case, ndarray(shape=(n_cases,2N)).
+        K and its factorization are reused until material or fixed nodes change.
+        """
+        self.preprocess(assemble=False)
+        return self.backward_cases(self.cal_force_cases(force_cases))
+
 
-class OneStepFea(OneStepSolver,PreProcessor,PostProcessor,PlotProcessor):
+class OneStepFea(OneStepSolver,PreProcessor,PostProcessor,PlotProcessor,CheckpointProcessor):
     """
     The simplest analysis, suits for elastic material and only has one increment. 
     Firstly, set the boundary condition;
@@ -35,7 +48,38 @@ class OneStepFea(OneStepSolver,PreProcessor,PostProcessor,PlotProcessor):
         """Before submit, set the boundary condition first."""
         self.preprocess()
         self.slove()
-        if not self.solved: print('Unsuccessful!')
+        if not self.solved: print(f'Unsuccessful! {self.__report()}')
+        if postprocess:
+            self.zero_global_force()
+            self.forward(tangent=False)
+            self.update_show_dict()
+
+    def __report(self):
+        if not self.iteration_log: return ''
+        log=self.iteration_log[-1]
+        return f"Relative residual is {log['residual']:.2e} after {len(self.iteration_log)} cycles."
+
+
+class IncrementalFea(IncrementalSolver,PreProcessor,PostProcessor,PlotProcessor,CheckpointProcessor):
+    """
+    Nonlinear analysis applying the load by adaptive increments, suits for strongly nonlinear material.
+    Firstly, set the boundary condition, and (optional) set_increment and set_step_output;
+    Secondly, submit the task;
+    Finally, view or plot the result of the full load.
+    """
+    def __init__(self, mesh):
+        super().__init__(mesh)
+
+    def submit(self,postprocess=True,nonlinear=True):
+        """Before submit, set the boundary condition first."""
+        self.preprocess()
+        self.slove()
+        if not self.solved: print(f'Unsuccessful! {self.__report()}')
         if postprocess:
-            self.forward()
-            self.update_show_dict()
\ No newline at end of file
+            self.zero_global_force()
+            self.forward(tangent=False)
+            self.update_show_dict()
+
+    def __report(self):
+        log=self.step_log[-1]
+        return f"Increment to load factor {log['factor']:.2e} is not converged."
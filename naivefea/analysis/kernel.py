@@ -1,5 +1,11 @@
+import copy
+
 import numpy as np
+from scipy import sparse
 from .. import element
+from ..element.element import CommonTriangleElementBatch
+from ..mesh.mesh import get_mesh_sets
+from . import backend
 
 
 class GlobalSystem:
@@ -8,19 +14,152 @@ class GlobalSystem:
     """
     def __init__(self,mesh):
         self.simplest=True
-        self.material_dict_location=dict()
-        self.material_dict=dict()
+        self.sparse=False
+        self.incremental=False
+        self.strain_tol=0.0
+        self.geometry_cache_hits=0
+        self.geometry_cache_misses=0
+        self.__geometry=None
         self.__get_mesh_data(mesh)
+        self.__init_material()
+
+    @property
+    def nodes(self):
+        return self.__nodes
+
+    @nodes.setter
+    def nodes(self,nodes):
+        self.__nodes=nodes
+        self.clear_geometry_cache()
+
+    @property
+    def elements(self):
+        return self.__elements
+
+    @elements.setter
+    def elements(self,elements):
+        self.__elements=elements
+        self.clear_geometry_cache()
 
     def __get_mesh_data(self, mesh):
         self.nodes=mesh.points[:,:2]
         self.elements=mesh.cells_dict['triangle']
+        self.node_sets,self.element_sets=get_mesh_sets(mesh)
+        self.original_index=None # original index of each node after compacting, None if not compacted
+        self.node_map=None # current index of each original node, -1 for removed ones
+
+    def get_node_set(self,name):
+        """node indexes of a named node set of the mesh."""
+        if name not in self.node_sets: raise ValueError(f'unknown node set: {name}')
+        return self.node_sets[name]
+
+    def get_element_set(self,name):
+        """element indexes of a named element set of the mesh."""
+        if name not in self.element_sets: raise ValueError(f'unknown element set: {name}')
+        return self.element_sets[name]
+
+    def set_sparse(self,mode=True):
+        """assemble the global stiffness as a sparse CSR matrix, suits for large mesh."""
+        self.sparse=mode
+
+    def set_incremental_assembly(self,mode=True,strain_tol=0.0):
+        """
+        Keep K between forward passes and only recalculate K_element of elements whose strain
+        changed more than strain_tol since their last K_element, stress and force are always exact.
+        K of elements with constant tangent (linear material) is assembled once and frozen.
+        """
+        self.incremental=mode
+        self.strain_tol=strain_tol
+        self.reset_incremental_assembly()
+
+    # material of elements, grouped by material
+    def __init_material(self):
+        """materials[material_index[element]] is the material of each element, -1 for unassigned."""
+        self.materials=list()
+        self.material_index=np.full(len(self.elements),-1,dtype=np.int64)
+        self.__material_groups=None
+
+    def assign_material(self,material,element_indexes):
+        """assign material to the elements given by an int array."""
+        if material not in self.materials: self.materials.append(material)
+        self.material_index[element_indexes]=self.materials.index(material)
+        self.__material_groups=None
+        self.reset_incremental_assembly()
+
+    def assigned_material_names(self):
+        used_index=np.unique(self.material_index[self.material_index>=0])
+        return [self.materials[index].name for index in used_index]
+
+    @property
+    def material_groups(self):
+        """list of (material, element indexes) for each material in use, built once after assigning."""
+        if self.__material_groups is None:
+            self.__material_groups=self.__group_by_material(np.arange(len(self.elements)))
+        return self.__material_groups
+
+    @property
+    def material_dict_location(self):
+        """{element index: material}"""
+        return {index:self.materials[i] for index,i in enumerate(self.material_index.tolist()) if i>=0}
+
+    @property
+    def material_dict(self):
+        """{element index: material name}"""
+        return {index:material.name for index,material in self.material_dict_location.items()}
+
+    def cal_material_key(self):
+        """Identify the material assignment, including D of linear materials."""
+        D_list=[getattr(material,'D',np.zeros(0)).tobytes() for material in self.materials]
+        return self.material_index.tobytes(),tuple(map(id,self.materials)),tuple(D_list)
+
+    # geometry of elements, unchanged in small strain analysis
+    def clear_geometry_cache(self):
+        """Call it after modifying nodes or elements in place."""
+        self.__geometry=None
+        self.__incidence=None
+        self.__K_pattern=None
+        self.__K_built=False
+        self.reset_incremental_assembly()
+
+    def __get_geometry(self):
+        if self.__geometry is None:
+            self.geometry_cache_misses+=1
+            self.__geometry=self.__cal_geometry()
+        else:
+            self.geometry_cache_hits+=1
+        return self.__geometry
+
+    def __cal_geometry(self):
+        elements=CommonTriangleElementBatch(self.nodes[self.elements])
+        node_indexes=self.elements.astype(np.int64)
+        element_map=np.stack([2*node_indexes,2*node_indexes+1],axis=-1).reshape(-1,6)
+        return {'double_area':elements.double_area,'B':elements.B,'element_map':element_map}
+
+    @property
+    def element_area(self):
+        """area of each element, from the cached element geometry."""
+        return 0.5*self.__get_geometry()['double_area']
+
+    @property
+    def node_incidence(self):
+        """sparse CSR (N,E), area of element e at (n,e) if node n is a vertex of it, built once."""
+        if self.__incidence is None:
+            self.__incidence=self.__cal_node_incidence()
+        return self.__incidence
+
+    def __cal_node_incidence(self):
+        area=0.5*np.abs(self.__get_geometry()['double_area'])
+        rows=self.elements.reshape(-1)
+        cols=np.repeat(np.arange(len(self.elements)),3)
+        return sparse.csr_matrix((np.repeat(area,3),(rows,cols)),shape=(len(self.nodes),len(self.elements)))
 
     # calculation for general material
     def init_global_system(self):
+        self.__get_geometry()
         self.init_global_vars()
         self.init_elements_vars()
         self.init_global_K()
+        self.reset_incremental_assembly()
 
     def init_global_vars(self):
         self.__len_global=2*len(self.nodes)
@@ -50,67 +189,181 @@ class GlobalSystem:
         if self.simplest: self.__cal_K()
 
     def zero_global_K(self):
-        self.K=np.zeros((self.__len_global,self.__len_global))
+        """K keeps its memory (and sparse pattern) once built, only values are zeroed."""
+        if self.__K_zeroable():
+            if self.sparse: self.K.data[:]=0.0
+            else: self.K.fill(0.0)
+        elif self.sparse:
+            pattern=self.__get_K_pattern()
+            data=np.zeros(len(pattern['indices']))
+            shape=(self.__len_global,self.__len_global)
+            self.K=sparse.csr_matrix((data,pattern['indices'],pattern['indptr']),shape=shape)
+            self.K.has_sorted_indices=True
+        else:
+            self.K=np.zeros((self.__len_global,self.__len_global))
+        self.__K_built=True
+
+    def __K_zeroable(self):
+        if not self.__K_built or not hasattr(self,'K'): return False
+        if self.sparse: return sparse.issparse(self.K) and self.K.nnz==len(self.__get_K_pattern()['indices'])
+        return isinstance(self.K,np.ndarray) and self.K.shape==(self.__len_global,self.__len_global)
+
+    # fixed pattern of K, built once for all elements
+    def __get_K_pattern(self):
+        if self.__K_pattern is None or self.__K_pattern['sparse']!=self.sparse:
+            self.__K_pattern=self.__cal_K_pattern()
+        return self.__K_pattern
+
+    def __cal_K_pattern(self):
+        """
+        Symbolic assembly: 'scatter' is the (E,36) position of each K_element entry
+        in K.data (sparse, CSR with 'indices' and 'indptr') or in K.ravel() (dense).
+        """
+        len_global=2*len(self.nodes)
+        element_map=self.__get_geometry()['element_map']
+        rows=np.repeat(element_map,6,axis=1)
+        cols=np.tile(element_map,6)
+        flat_index=rows*len_global+cols
+        if not self.sparse: return {'sparse':False,'scatter':flat_index}
+        keys,scatter=np.unique(flat_index,return_inverse=True)
+        indptr=np.zeros(len_global+1,dtype=np.int64)
+        indptr[1:]=np.cumsum(np.bincount(keys//len_global,minlength=len_global))
+        return {'sparse':True,'scatter':scatter.reshape(-1,36),'indices':keys%len_global,'indptr':indptr}
     
     def __cal_K(self):
-        for element_index,_ in enumerate(self.elements):
-            element=self.__instant_Element(element_index)
-            self.__Ke2K(element)
+        for material,element_indexes in self.material_groups:
+            elements=self.__instant_Elements(material,element_indexes)
+            elements.element_integrate()
+            self.__Ke2K(element_indexes,elements.K_element)
     
-    def forward(self,element_indexes=None):
-        if not bool(element_indexes): element_indexes=range(len(self.elements))
-        for element_index in element_indexes:
-            element=self.__instant_deformed_Element(element_index)
-            self.__element_forward(element_index, element)
-            self.__Fe2F(element)
-            self.__Ke2K(element)
+    def forward(self,element_indexes=None,tangent=True):
+        """Assemble force and (if tangent) K of the given elements, all elements by default."""
+        if element_indexes is None and self.incremental: return self.__incremental_forward(tangent)
+        if element_indexes is None:
+            results=self.cal_elements(np.arange(len(self.elements)),tangent)
+            self.assemble_elements(slice(None),*results,tangent=tangent)
+            return
+        element_indexes=np.asarray(element_indexes,dtype=np.int64)
+        results=self.cal_elements(element_indexes,tangent)
+        self.assemble_elements(element_indexes,*results,tangent=tangent)
+
+    def cal_elements(self,element_indexes,tangent=True):
+        """
+        Calculate the given elements without assembling them.
+        Return strain (E,3), stress (E,3), force (E,6) and K_element (E,6,6), which is None if not tangent.
+        """
+        len_elements=len(element_indexes)
+        strain=np.zeros((len_elements,3))
+        stress=np.zeros((len_elements,3))
+        force=np.zeros((len_elements,6))
+        K_element=np.zeros((len_elements,6,6)) if tangent else None
+        if len_elements==len(self.elements) and np.array_equal(element_indexes,np.arange(len_elements)):
+            groups=self.material_groups
+        else:
+            groups=self.__group_by_material(element_indexes)
+        for material,positions in groups:
+            elements=self.__instant_deformed_Elements(material,element_indexes[positions])
+            elements.forward(tangent)
+            strain[positions]=elements.strain
+            stress[positions]=elements.stress
+            force[positions]=elements.force
+            if tangent: K_element[positions]=elements.K_element
+        return strain,stress,force,K_element
+
+    def assemble_elements(self,element_indexes,strain,stress,force,K_element,tangent=True):
+        """
+        Add the element results given by cal_elements into the global system, K is kept if not tangent.
+        element_indexes=slice(None) stands for all elements, the cached maps are then used without copying.
+        """
+        self.strain[element_indexes]=strain
+        self.stress[element_indexes]=stress
+        self.__Fe2F(element_indexes,force)
+        if tangent: self.__Ke2K(element_indexes,K_element)
+
+    # incremental assembly, K is kept and corrected by changed elements
+    def reset_incremental_assembly(self):
+        """Forget the element contributions kept in K, call it after zeroing K."""
+        self.__K_element=None
+
+    def __init_incremental_assembly(self):
+        len_elements=len(self.elements)
+        self.__K_element=np.zeros((len_elements,6,6))
+        self.__tangent_strain=np.full((len_elements,3),np.nan)
+        self.__frozen=np.zeros(len_elements,dtype=bool)
+        self.__constant=np.zeros(len_elements,dtype=bool)
+        for material,element_indexes in self.material_groups:
+            self.__constant[element_indexes]=material.constant_tangent
+
+    def __incremental_forward(self,tangent):
+        """
+        Stress and force of all elements are calculated exactly in every pass.
+        Only K_element of elements whose strain changed more than strain_tol since its last calculation
+        is recalculated and corrected in K, that of constant tangent elements is calculated once.
+        """
+        if self.__K_element is None: self.__init_incremental_assembly()
+        updated=np.zeros(len(self.elements),dtype=bool)
+        if tangent: updated=self.__changed(self.__cal_all_strain(),self.__tangent_strain)&~self.__frozen
+        element_indexes=np.flatnonzero(updated)
+        results=self.cal_elements(element_indexes)
+        self.assemble_elements(element_indexes,*results[:3],None,tangent=False)
+        self.__update_tangent(element_indexes,results[0],results[3])
+        other_indexes=np.flatnonzero(~updated)
+        self.assemble_elements(other_indexes,*self.cal_elements(other_indexes,tangent=False),tangent=False)
+        self.updated_elements=len(element_indexes)
+
+    def __update_tangent(self,element_indexes,strain,K_element):
+        """subtract the old K_element of changed elements from K and add the new one."""
+        self.__Ke2K(element_indexes,K_element-self.__K_element[element_indexes])
+        self.__K_element[element_indexes]=K_element
+        self.__tangent_strain[element_indexes]=strain
+        self.__frozen[element_indexes]=self.__constant[element_indexes]
+
+    def __cal_all_strain(self):
+        geometry=self.__get_geometry()
+        deform_local=self.deform[geometry['element_map']]
+        return np.einsum('eij,ej->ei',geometry['B'],deform_local)
+
+    def __changed(self,strain,strain_old):
+        """elements with strain changed more than strain_tol, including those never calculated (nan)."""
+        return ~np.all(np.abs(strain-strain_old)<=self.strain_tol,axis=1)
+
+    def __group_by_material(self,element_indexes):
+        """Split positions of element_indexes into sorted groups sharing the same material."""
+        material_index=self.material_index[element_indexes]
+        if np.any(material_index<0): raise ValueError('material is not assigned to all elements')
+        order=np.argsort(material_index,kind='stable')
+        bounds=np.flatnonzero(np.diff(material_index[order]))+1
+        return [(self.materials[material_index[positions[0]]],positions) \
+            for positions in np.split(order,bounds) if len(positions)]
     
-    def __instant_deformed_Element(self, element_index):
-        element=self.__instant_Element(element_index)
-        node_indexes=self.elements[element_index]
-        deform_local=self.__get_deform_list(node_indexes)
-        element.set_deform(deform_local)
-        return element
+    def __instant_deformed_Elements(self,material,element_indexes):
+        elements=self.__instant_Elements(material,element_indexes)
+        node_indexes=self.elements[element_indexes]
+        deform_local=self.deform.reshape(-1,2)[node_indexes].reshape(-1,6)
+        elements.set_deform(deform_local)
+        return elements
     
-    def __instant_Element(self,element_index):
-        material=self.material_dict_location[element_index]
-        node_indexes=self.elements[element_index]
-        positions=np.array([self.nodes[node_indexes[j]][:] for j in range(3)])
+    def __instant_Elements(self,material,element_indexes):
+        geometry=self.__get_geometry()
+        double_area=geometry['double_area'][element_indexes]
+        B=geometry['B'][element_indexes]
         if self.simplest:
-            element_instance=element.SimpleTriangleElement(material,positions)
+            return element.SimpleTriangleElementBatch(material,None,(double_area,B))
         else:
-            element_instance=element.TriangleElement(material,positions)
-        element_instance.set_node_indexes(node_indexes)
-        return element_instance
-    
-    def __get_deform_list(self,node_indexes):
-        deform_local=[[self.deform[2*node],self.deform[2*node+1]] \
-            for node in node_indexes.tolist()]
-        return np.array(deform_local).reshape(-1)
-
-    def __element_forward(self, element_index, element):
-        element.forward()
-        self.strain[element_index]=element.strain
-        self.stress[element_index]=element.stress
-
-    def __Fe2F(self,element):
-        force_element=element.force
-        node_indexes=element.node_indexes
-        deform_global_index=self.__cal_element_map(node_indexes)
-        for i_local,i_global in enumerate(deform_global_index):
-            self.force[i_global]+=force_element[i_local]
-
-    def __cal_element_map(self, node_indexes):
-        return np.array([[2*node_indexes[i],2*node_indexes[i]+1] \
-            for i in range(3)],dtype=np.uint64).reshape(-1)
+            return element.TriangleElementBatch(material,None,(double_area,B))
+
+    def __Fe2F(self,element_indexes,force_element):
+        deform_global_index=self.__cal_element_map(element_indexes)
+        np.add.at(self.force,deform_global_index,force_element)
+
+    def __cal_element_map(self,element_indexes):
+        """global index of the 6 deform components of each element, shape=(E,6)"""
+        return self.__get_geometry()['element_map'][element_indexes]
     
-    def __Ke2K(self,element):
-        K_element=element.K_element
-        node_indexes=element.node_indexes
-        deform_global_index=self.__cal_element_map(node_indexes)
-        for i_local,i_global in enumerate(deform_global_index):
-            for j_local,j_global in enumerate(deform_global_index):
-                self.K[i_global,j_global]+=K_element[i_local,j_local]
+    def __Ke2K(self,element_indexes,K_element):
+        scatter=self.__get_K_pattern()['scatter'][element_indexes]
+        K_values=self.K.data if self.sparse else self.K.reshape(-1)
+        np.add.at(K_values,scatter,K_element.reshape(-1,36))
 
 
 class ReducedSystem(GlobalSystem):
@@ -119,52 +372,115 @@ class ReducedSystem(GlobalSystem):
     """
     def __init__(self, mesh):
         super().__init__(mesh)
+        self.set_solver()
+        self.__case_key=None
+
+    def set_solver(self,solver='auto',**options):
+        """
+        solver can be 'auto', 'dense', 'lu', 'cholesky', 'cg', or an instance of backend.CommonSolver.
+        'auto' chooses 'lu' for sparse assembly and 'dense' otherwise;
+        options are passed to the solver, such as preconditioner='ilu' for 'cg'.
+        After solving, iteration count, residual and convergence are kept in
+        self.solver_iterations, self.solver_residual and self.solver_converged.
+        """
+        if isinstance(solver,backend.CommonSolver):
+            self.solver=solver
+        elif solver=='auto':
+            self.solver=None
+        elif solver in backend.SOLVERS:
+            self.solver=backend.SOLVERS[solver](**options)
+        else:
+            raise ValueError(f'unknown solver: {solver}')
+        self.__solver_options=options
+
+    def get_solver(self):
+        """the solver given by set_solver, or a new one chosen by 'auto'."""
+        if self.solver is not None: return self.solver
+        solver='lu' if self.sparse else 'dense'
+        return backend.SOLVERS[solver](**self.__solver_options)
     
     # built the reduced strain, stress, and stiffness
-    def backward(self):
-        self.__init_reduce_system()
-        self.__solve_reduce_system()
-    
-    def __init_reduce_system(self):
-        self.__init_reduce_vars()
+    def backward(self,factorize=True):
+        """Solve the increment of deform, reuse the last factorization of reduced K if not factorize."""
         self.__update_reduce_force()
-        self.__init_reduce_K()
-
-    def __init_reduce_vars(self):
-        self.__reduce_ddeform=np.zeros(self.len_reduce)
-        self.__reduce_dforce=np.zeros(self.len_reduce)
+        if factorize:
+            self.__init_reduce_K()
+            self.__factorize_reduce_system()
+        self.__solve_reduce_system()
 
-    def __update_reduce_force(self):
-        force=self.force_obj-self.K@self.deform_obj
-        if not self.simplest: dforce=force-self.force
+    def cal_residual(self):
+        """unbalanced force on free deform, force_obj-force for general material."""
         if self.simplest:
-            for i_reduce,i_global in enumerate(self.deform_free_index):
-                self.__reduce_dforce[i_reduce]=force[i_global]
+            force=self.force_obj-self.K@self.deform_obj
         else:
-            for i_reduce,i_global in enumerate(self.deform_free_index):
-                self.__reduce_dforce[i_reduce]=dforce[i_global]
+            force=self.force_obj-self.force
+        return force[self.deform_free_index]
+
+    def __update_reduce_force(self):
+        self.__reduce_dforce=self.cal_residual()
+        self.residual_norm=np.linalg.norm(self.__reduce_dforce)
 
     def __init_reduce_K(self):
-        self.__reduce_K=np.zeros((self.len_reduce,self.len_reduce))
-        self.__cal_reduce_K()
+        free_index=self.deform_free_index
+        if self.sparse:
+            self.__reduce_K=self.K[free_index][:,free_index].tocsc()
+        else:
+            self.__reduce_K=self.K[np.ix_(free_index,free_index)]
 
-    def __cal_reduce_K(self):
-        for i_reduce,i_global in enumerate(self.deform_free_index):
-            for j_reduce,j_global in enumerate(self.deform_free_index):
-                self.__reduce_K[i_reduce,j_reduce]=self.K[i_global,j_global]
+    def __factorize_reduce_system(self):
+        self.__active_solver=self.get_solver()
+        self.__active_solver.factorize(self.__reduce_K)
 
     def __solve_reduce_system(self):
-            self.__reduce_ddeform=np.linalg.solve(self.__reduce_K,self.__reduce_dforce)
-            self.error=max(abs(self.__reduce_ddeform))
+        solver=self.__active_solver
+        self.__reduce_ddeform=solver.solve(self.__reduce_dforce)
+        self.solver_iterations=solver.iterations
+        self.solver_residual=solver.residual
+        self.solver_converged=solver.converged
+        self.error=np.max(np.abs(self.__reduce_ddeform),initial=0.0)
+        self.energy_norm=abs(self.__reduce_ddeform@self.__reduce_dforce)
+
+    # multiple load cases sharing one factorization
+    def backward_cases(self,force_cases):
+        """
+        Solve the reduced system for all force_cases=ndarray(shape=(n_cases,2N)) at once.
+        The factorization of reduced K is cached, keyed on material assignment and fixed deform indexes.
+        Return deform of all cases, ndarray(shape=(n_cases,2N)).
+        """
+        self.__factorize_cases()
+        free_index=self.deform_free_index
+        fix_index=self.deform_fix_index
+        dforce=force_cases[:,free_index]-self.__case_K_free_fix@self.deform_obj[fix_index]
+        deform_cases=np.tile(self.deform_obj,(len(force_cases),1))
+        deform_cases[:,free_index]=self.__case_solver.solve(dforce.T).T
+        self.solver_iterations=self.__case_solver.iterations
+        self.solver_residual=self.__case_solver.residual
+        self.solver_converged=self.__case_solver.converged
+        return deform_cases
+
+    def __factorize_cases(self):
+        key=self.__cal_case_key()
+        if key==self.__case_key: return
+        self.init_global_K()
+        self.__init_reduce_K()
+        self.__case_solver=copy.copy(self.get_solver())
+        self.__case_solver.factorize(self.__reduce_K)
+        self.__case_K_free_fix=self.K[self.deform_free_index][:,self.deform_fix_index]
+        self.__case_key=key
+
+    def __cal_case_key(self):
+        fix_key=self.deform_fix_index.tobytes(),self.deform_free_index.tobytes()
+        mesh_key=(id(self.nodes),id(self.elements),self.sparse,id(self.solver))
+        return self.cal_material_key(),fix_key,mesh_key
 
-    def optimize(self):
-        self.__update_ddeform()
+    def optimize(self,alpha=1.0):
+        """Update deform by alpha times of the solved increment."""
+        self.__update_ddeform(alpha)
         self.__update_global_deform()
         self.__update_global_force()
 
-    def __update_ddeform(self):
-        for i_reduce,i_global in enumerate(self.deform_free_index):
-            self.ddeform[i_global]=self.__reduce_ddeform[i_reduce]
+    def __update_ddeform(self,alpha):
+        self.ddeform[self.deform_free_index]=alpha*self.__reduce_ddeform
 
     def __update_global_deform(self):
         self.deform+=self.ddeform
@@ -1,8 +1,19 @@
+import os
+import copy
+import time
+import multiprocessing
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.tri as tri
+from scipy import sparse
+from scipy.sparse import csgraph
 
 from . import kernel
+from . import render
+from ..mesh import quality
+from ..mesh.mesh import find_boundary_edges
+from .derived import DerivedFields,DERIVED_FIELDS
 
 
 class PreProcessor(kernel.ReducedSystem):
@@ -10,13 +21,18 @@ class PreProcessor(kernel.ReducedSystem):
         super().__init__(mesh)
         self.__init_condition()
         self.__init_show_dict()
+        self.set_reordering(None)
+        self.set_mesh_check()
 
     def __init_condition(self):
-        self.x_given=set()
-        self.y_given=set()
-        self.x_given_displace=dict()
-        self.y_given_displace=dict()
-        self.f_given=dict()
+        """
+        conditions of each global deform component: fixed or not, given deform, given nodal force,
+        and nodal force equivalent to the distributed loads.
+        """
+        self.deform_fixed=np.zeros(2*len(self.nodes),dtype=bool)
+        self.deform_given=np.zeros(2*len(self.nodes))
+        self.force_given=np.zeros(2*len(self.nodes))
+        self.distributed_force=np.zeros(2*len(self.nodes))
     
     def __init_show_dict(self):
         self.__init_reference_dict()
@@ -35,158 +51,421 @@ class PreProcessor(kernel.ReducedSystem):
             'stress':{'S11':[],'S22':[],'S12':[]}}
     
     # preprocess
+    #   check mesh
+    def set_mesh_check(self,mode=True,**options):
+        """
+        Validate the mesh by check_mesh before assembly, once for the current nodes and elements,
+        options (fix_orientation, min_angle, max_aspect_ratio, tol) are passed to check_mesh.
+        """
+        self.mesh_check=mode
+        self.__mesh_check_options=options
+        self.__mesh_checked=None
+
+    def check_mesh(self,fix_orientation=False,min_angle=0.0,max_aspect_ratio=np.inf,tol=None):
+        """
+        Check quality of all elements in one vectorized pass, the report is kept in self.mesh_quality
+        (per element 'signed_area', 'aspect_ratio', 'min_angle', see mesh.check_mesh).
+        Raise ValueError for degenerate elements, elements with an angle (degree) below min_angle or
+        an aspect ratio above max_aspect_ratio, and inverted (clockwise) elements unless fix_orientation,
+        which renumbers them counterclockwise. Duplicate nodes and orphan deform are only reported.
+        """
+        report=quality.check_mesh(self.nodes,self.elements,tol)
+        self.mesh_quality=report
+        self.__raise_bad_elements('degenerate',report['degenerate'])
+        self.__raise_bad_elements('sliver',np.flatnonzero((report['min_angle']<min_angle)\
+            |(report['aspect_ratio']>max_aspect_ratio)))
+        if len(report['inverted']) and fix_orientation:
+            self.elements=quality.fix_orientation(self.elements,report['inverted'])
+            print(f"{len(report['inverted'])} inverted elements are renumbered counterclockwise.")
+        elif len(report['inverted']):
+            self.__raise_bad_elements('inverted (clockwise)',report['inverted'],
+                ', check_mesh(fix_orientation=True) renumbers them')
+        if len(report['duplicate_nodes']):
+            print(f"{len(report['duplicate_nodes'])} pairs of duplicate nodes, "
+                f"e.g. {report['duplicate_nodes'][:5].tolist()}.")
+        if len(report['orphan_dofs']):
+            print(f"{len(report['orphan_dofs'])} deform of nodes without element are fixed, compact_mesh removes them, "
+                f"e.g. nodes {np.unique(report['orphan_dofs']//2)[:10].tolist()}.")
+        return report
+
+    def compact_mesh(self,merge=True,remove_unused=True,tol=None):
+        """
+        Merge duplicate nodes (closer than tol) and remove nodes without element,
+        node sets and conditions are renumbered, forces on merged nodes are summed.
+        self.original_index (original index of each node) and self.node_map (current index of
+        each original node, -1 for removed) map results back, see cal_original_nodal.
+        """
+        self.check_solved()
+        kept,node_map=quality.cal_node_compaction(self.nodes,self.elements,merge,remove_unused,tol)
+        if len(kept)==len(self.nodes): return
+        self.nodes=self.nodes[kept]
+        self.elements=node_map[self.elements]
+        self.node_sets={name:np.unique(node_map[indexes][node_map[indexes]>=0]) \
+            for name,indexes in self.node_sets.items()}
+        self.__compact_conditions(node_map)
+        if self.node_map is None:
+            self.original_index,self.node_map=kept,node_map
+        else:
+            self.original_index=self.original_index[kept]
+            self.node_map=np.where(self.node_map>=0,node_map[self.node_map],-1)
+        self.__init_show_dict()
+        print(f'{len(node_map)-len(kept)} nodes are merged or removed, {len(kept)} nodes are left.')
+
+    def __compact_conditions(self,node_map):
+        deform_fixed=self.deform_fixed.reshape(-1,2)
+        deform_given=self.deform_given.reshape(-1,2)
+        force_given=self.force_given.reshape(-1,2)
+        distributed_force=self.distributed_force.reshape(-1,2)
+        kept=node_map>=0
+        loaded=np.any(force_given!=0.0,axis=1)|np.any(distributed_force!=0.0,axis=1)
+        removed=np.flatnonzero(~kept&(np.any(deform_fixed,axis=1)|loaded))
+        if len(removed): print(f'Conditions on removed nodes {removed[:10].tolist()} are dropped.')
+        self.__init_condition()
+        for direction in (0,1):
+            nodes=np.flatnonzero(kept&deform_fixed[:,direction])
+            self.__give_deform(node_map[nodes],deform_given[nodes,direction],direction)
+        np.add.at(self.force_given.reshape(-1,2),node_map[kept],force_given[kept])
+        np.add.at(self.distributed_force.reshape(-1,2),node_map[kept],distributed_force[kept])
+
+    @staticmethod
+    def __raise_bad_elements(kind,element_indexes,hint=''):
+        if len(element_indexes):
+            raise ValueError(f'{len(element_indexes)} {kind} elements, e.g. {element_indexes[:10].tolist()}{hint}')
+
+    def __check_mesh_once(self):
+        if not self.mesh_check: return
+        checked=self.__mesh_checked
+        if checked is not None and checked[0] is self.nodes and checked[1] is self.elements: return
+        self.check_mesh(**self.__mesh_check_options)
+        self.__mesh_checked=(self.nodes,self.elements)
+
     #   set material
     def uniform_material(self,material,element_set='all'):
-        """assign the given material to all elements of current analysis."""
+        """
+        assign the given material to elements of current analysis,
+        element_set can be 'all', element indexes, a bool mask of elements or name of an element set of the mesh.
+        """
         self.check_solved()
+        self.__update_material(material,self.__get_elements(element_set))
+
+    def __get_elements(self,element_set):
         if type(element_set)==str and element_set=='all':
-            for element_index,_ in enumerate(self.elements):
-                self.__update_material(material, element_index)
+            element_indexes=np.arange(len(self.elements))
+        elif type(element_set)==str:
+            element_indexes=self.get_element_set(element_set)
+        elif isinstance(element_set,np.ndarray) and element_set.dtype==bool:
+            if len(element_set)!=len(self.elements): raise ValueError
+            element_indexes=np.flatnonzero(element_set)
         else:
-            for element_index in element_set:
-                self.__update_material(material, element_index)
+            element_indexes=np.array(list(element_set) if isinstance(element_set,set) \
+                else element_set,dtype=np.int64).reshape(-1)
+        if np.any(element_indexes<0) or np.any(element_indexes>=len(self.elements)): raise ValueError
+        return element_indexes
 
-    def __update_material(self, material, element_index):
-        if element_index > len(self.elements): raise ValueError
-        if material not in self.material_dict_location.values() \
-            and material.name in self.material_dict.values():
+    def __update_material(self, material, element_indexes):
+        if material not in self.materials \
+            and material.name in self.assigned_material_names():
             material.name=material.name+'*'
-        self.material_dict_location.update({element_index:material})
-        self.material_dict.update({element_index:material.name})
+        self.assign_material(material,element_indexes)
     
     #   set boundary condition
+    def select_nodes(self,predicate=None,box=None,x=None,y=None,tol=None):
+        """
+        indexes of nodes selected vectorized over self.nodes, all the given criteria must hold:
+        predicate(x,y) returns a bool array of node coordinates, e.g. lambda x,y: x**2+y**2<1.0;
+        box=((xmin,ymin),(xmax,ymax)) includes its bounds; x=value, y=value select nodes on a line.
+        tol defaults to 1e-9 of the diagonal of the bounding box.
+        """
+        x_nodes,y_nodes=self.nodes[:,0],self.nodes[:,1]
+        if tol is None: tol=1e-9*np.hypot(*np.ptp(self.nodes,axis=0))
+        selected=np.ones(len(self.nodes),dtype=bool)
+        if predicate is not None: selected&=np.asarray(predicate(x_nodes,y_nodes),dtype=bool)
+        if box is not None:
+            (xmin,ymin),(xmax,ymax)=box
+            selected&=(x_nodes>=xmin-tol)&(x_nodes<=xmax+tol)&(y_nodes>=ymin-tol)&(y_nodes<=ymax+tol)
+        if x is not None: selected&=np.abs(x_nodes-x)<=tol
+        if y is not None: selected&=np.abs(y_nodes-y)<=tol
+        return np.flatnonzero(selected)
+
+    def add_node_set(self,name,nodes=None,**selector):
+        """add a named node set of the given nodes, or of select_nodes(**selector)."""
+        self.node_sets[name]=self.select_nodes(**selector) if nodes is None else self.__get_nodes(nodes)
+
     def set_deform_conditions(self,operation='fix',Ux=set(),Uy=set(),Uxy=set()):
-        """assign deformation on the given nodes."""
+        """
+        assign deformation on the given nodes.
+        Nodes can be given by name of a node set of the mesh,
+        for 'displace' the keys of the dicts can be names of node sets too.
+        """
         self.check_solved()
         if operation=='fix': 
-            self.__fix_node_deform(Ux,Uy)
-            self.__fix_node_deform(Uxy,Uxy)
+            self.__give_deform(self.__get_nodes(Ux),0.0,0)
+            self.__give_deform(self.__get_nodes(Uy),0.0,1)
+            self.__give_deform(self.__get_nodes(Uxy),0.0,0)
+            self.__give_deform(self.__get_nodes(Uxy),0.0,1)
         elif operation=='displace': 
-            if type(Ux)==dict: self.__displace_for_x(Ux)
-            if type(Uy)==dict: self.__displace_for_y(Uy)
-            if type(Uxy)==dict: self.__displace_for_xy(Uxy)
+            if type(Ux)==dict: self.__give_deform(*self.__split_nodes_dict(Ux,1),0)
+            if type(Uy)==dict: self.__give_deform(*self.__split_nodes_dict(Uy,1),1)
+            if type(Uxy)==dict:
+                nodes,displace=self.__split_nodes_dict(Uxy,2)
+                self.__give_deform(nodes,displace[:,0],0)
+                self.__give_deform(nodes,displace[:,1],1)
         else:
             raise ValueError
 
-    def __fix_node_deform(self, x_fix, y_fix):
-        self.x_given.update(x_fix)
-        self.y_given.update(y_fix)
-        for x in x_fix:
-            self.x_given_displace.update({x:0.0})
-        for y in y_fix:
-            self.y_given_displace.update({y:0.0})
-    
-    def __displace_for_x(self,x_displace):
-        self.x_given_displace.update(x_displace)
-        self.x_given.update(x_displace.keys())
-    
-    def __displace_for_y(self,y_displace):
-        self.y_given_displace.update(y_displace)
-        self.y_given.update(y_displace.keys())
-
-    def __displace_for_xy(self,xy_condition):
-        x_dict=dict()
-        y_dict=dict()
-        for node,displace in xy_condition.items():
-            x_dict.update({node:displace[0]})
-            y_dict.update({node:displace[1]})
-        self.__displace_for_x(x_dict)
-        self.__displace_for_y(y_dict)
+    def set_displacement(self,nodes,Ux=None,Uy=None):
+        """
+        give deform of nodes: indexes, a bool mask, name of a node set or a predicate(x,y) as in select_nodes.
+        Ux, Uy are one value or a value per node, None leaves that direction as it is.
+        """
+        self.check_solved()
+        nodes=self.__get_nodes(nodes)
+        if Ux is not None: self.__give_deform(nodes,Ux,0)
+        if Uy is not None: self.__give_deform(nodes,Uy,1)
 
     def set_force_conditions(self,f_given):
-        """assign force load on the given nodes."""
+        """assign force load on the given nodes, f_given={node or name of a node set: (Fx,Fy)}."""
         self.check_solved()
-        self.f_given.update(f_given)
+        nodes,forces=self.__split_nodes_dict(f_given,2)
+        self.__give_force(nodes,forces)
+
+    def set_nodal_force(self,nodes,Fx=0.0,Fy=0.0):
+        """assign force on nodes given as in set_displacement, Fx, Fy are one value or a value per node."""
+        self.check_solved()
+        nodes=self.__get_nodes(nodes)
+        self.__give_force(nodes,np.stack(np.broadcast_arrays(Fx,Fy,nodes)[:2],axis=1))
+
+    #   distributed load, added to nodal force by its consistent nodal force
+    def set_body_force(self,bx=0.0,by=0.0,element_set='all'):
+        """
+        load per unit area (e.g. density times gravity and thickness) on elements given as in uniform_material,
+        bx, by are one value or a value per element. A third of the load of an element goes to each of its nodes.
+        """
+        self.check_solved()
+        element_indexes=self.__get_elements(element_set)
+        load=np.stack(np.broadcast_arrays(bx,by,element_indexes)[:2],axis=-1)
+        force=(self.element_area[element_indexes,None]/3.0)*load
+        np.add.at(self.distributed_force.reshape(-1,2),self.elements[element_indexes],force[:,None,:])
+
+    def set_edge_traction(self,edges,tx=0.0,ty=0.0,pressure=0.0):
+        """
+        load per unit length on boundary edges, given as node pairs ndarray(shape=(n,2)), or as nodes
+        (see set_displacement) of which the boundary edges having both nodes are loaded.
+        tx, ty are traction along x and y, pressure acts along the inward normal;
+        each is one value or a value per edge, constant along the edge. Half of the load of an edge goes to each node.
+        """
+        self.check_solved()
+        edges=self.__get_boundary_edges(edges)
+        tangent=self.nodes[edges[:,1]]-self.nodes[edges[:,0]]
+        length=np.hypot(tangent[:,0],tangent[:,1])
+        traction=np.stack(np.broadcast_arrays(tx,ty,length)[:2],axis=-1)
+        outward=np.stack([tangent[:,1],-tangent[:,0]],axis=1)
+        force=length[:,None]*traction-np.reshape(pressure,(-1,1))*outward
+        np.add.at(self.distributed_force.reshape(-1,2),edges,0.5*force[:,None,:])
+
+    def __get_boundary_edges(self,edges):
+        """boundary edges, directed with the mesh on the left, of node pairs or of nodes."""
+        boundary=find_boundary_edges(self.nodes,self.elements)
+        if isinstance(edges,(list,tuple,np.ndarray)) and np.ndim(edges)==2:
+            edges=np.asarray(edges,dtype=np.int64)
+            len_nodes=len(self.nodes)
+            boundary_keys=boundary.min(axis=1)*len_nodes+boundary.max(axis=1)
+            order=np.argsort(boundary_keys)
+            keys=edges.min(axis=1)*len_nodes+edges.max(axis=1)
+            position=np.minimum(np.searchsorted(boundary_keys,keys,sorter=order),len(order)-1)
+            found=boundary_keys[order[position]]==keys if len(order) else np.zeros(len(keys),dtype=bool)
+            if not np.all(found): raise ValueError(f'edges are not on the boundary: {edges[~found][:10].tolist()}')
+            return boundary[order[position]]
+        selected=np.zeros(len(self.nodes),dtype=bool)
+        selected[self.__get_nodes(edges)]=True
+        return boundary[selected[boundary[:,0]]&selected[boundary[:,1]]]
+
+    def __get_nodes(self,nodes):
+        """node indexes, ndarray(int), of a node set name, a predicate, a bool mask or iterable indexes."""
+        if type(nodes)==str: return self.get_node_set(nodes)
+        if callable(nodes): return self.select_nodes(nodes)
+        if isinstance(nodes,np.ndarray) and nodes.dtype==bool: return np.flatnonzero(nodes)
+        if isinstance(nodes,np.ndarray): return nodes.astype(np.int64).reshape(-1)
+        return np.fromiter(nodes,dtype=np.int64)
+
+    def __split_nodes_dict(self,nodes_dict,width):
+        """node indexes and values, ndarray(shape=(n,width)), of {node or name of a node set: value}."""
+        nodes=[self.__get_nodes(key) if type(key)==str else np.array([key],dtype=np.int64) for key in nodes_dict]
+        values=np.array(list(nodes_dict.values()),dtype=np.float64).reshape(len(nodes_dict),width)
+        if not nodes: return np.zeros(0,dtype=np.int64),values
+        return np.concatenate(nodes),np.repeat(values,[len(n) for n in nodes],axis=0)
+
+    def __check_nodes(self,nodes):
+        if np.any(nodes<0) or np.any(nodes>=len(self.nodes)): raise ValueError
+
+    def __give_deform(self,nodes,values,direction):
+        self.__check_nodes(nodes)
+        self.deform_fixed[2*nodes+direction]=True
+        self.deform_given[2*nodes+direction]=np.reshape(values,-1) if np.ndim(values) else values
+
+    def __give_force(self,nodes,forces):
+        self.__check_nodes(nodes)
+        self.force_given.reshape(-1,2)[nodes]=forces
+    
+    def cal_force_cases(self,force_cases):
+        """
+        convert a list of f_given (or nodal force, ndarray(shape=(n_cases,2N))) to force_obj of each case,
+        the distributed force of set_body_force and set_edge_traction is added to every case.
+        """
+        if isinstance(force_cases,np.ndarray): return np.atleast_2d(force_cases)+self.distributed_force
+        force_obj_cases=np.zeros((len(force_cases),2*len(self.nodes)))
+        for force_obj,f_given in zip(force_obj_cases,force_cases):
+            nodes,forces=self.__split_nodes_dict(f_given,2)
+            force_obj.reshape(-1,2)[nodes]=forces
+        return force_obj_cases+self.distributed_force
+
+    #   conditions as sets and dicts of nodes, read only views of the condition arrays
+    @property
+    def x_given(self):
+        return set(np.flatnonzero(self.deform_fixed[0::2]).tolist())
+
+    @property
+    def y_given(self):
+        return set(np.flatnonzero(self.deform_fixed[1::2]).tolist())
+
+    @property
+    def x_given_displace(self):
+        nodes=np.flatnonzero(self.deform_fixed[0::2])
+        return dict(zip(nodes.tolist(),self.deform_given[2*nodes].tolist()))
+
+    @property
+    def y_given_displace(self):
+        nodes=np.flatnonzero(self.deform_fixed[1::2])
+        return dict(zip(nodes.tolist(),self.deform_given[2*nodes+1].tolist()))
+
+    @property
+    def f_given(self):
+        forces=self.force_given.reshape(-1,2)
+        nodes=np.flatnonzero(np.any(forces!=0.0,axis=1))
+        return dict(zip(nodes.tolist(),map(tuple,forces[nodes].tolist())))
     
     def set_equation(self):
         pass
     
     def clear_conditions(self,*name):
-        if 'Ux' in name:
-            self.x_given=set()
-            self.x_given_displace=dict()
-        if 'Uy' in name:
-            self.y_given=set()
-            self.y_given_displace=dict()
-        if 'Uxy' in name:
-            self.x_given=set()
-            self.x_given_displace=dict()
-            self.y_given=set()
-            self.y_given_displace=dict()
-        if 'F' in name:
-            self.f_given=dict()
-        if 'all' in name or not bool(name):
-            self.x_given=set()
-            self.x_given_displace=dict()
-            self.y_given=set()
-            self.y_given_displace=dict()
-            self.f_given=dict()
+        self.__clear_conditions(slice(None),name)
     
     def clear_node_conditions(self,node,*name):
-        if 'Ux' in name:
-            self.x_given.discard(node)
-            self.x_given_displace.pop(node,0)
-        if 'Uy' in name:
-            self.y_given.discard(node)
-            self.y_given_displace.pop(node,0)
-        if 'Uxy' in name:
-            self.x_given.discard(node)
-            self.x_given_displace.pop(node,0)
-            self.y_given.discard(node)
-            self.y_given_displace.pop(node,0)
-        if 'F' in name:
-            self.f_given.discard(node)
-        if 'all' in name or not bool(name):
-            self.x_given.discard(node)
-            self.x_given_displace.pop(node,0)
-            self.y_given.discard(node)
-            self.y_given_displace.pop(node,0)
-            self.f_given.pop(node,0)
+        """clear conditions of one node or of many nodes given as in set_displacement."""
+        self.__clear_conditions(self.__get_nodes([node] if np.isscalar(node) else node),name)
+
+    def __clear_conditions(self,nodes,name):
+        if 'all' in name or not bool(name): name=('Uxy','F','distributed')
+        deform_fixed=self.deform_fixed.reshape(-1,2)
+        deform_given=self.deform_given.reshape(-1,2)
+        for direction,key in ((0,'Ux'),(1,'Uy')):
+            if key in name or 'Uxy' in name:
+                deform_fixed[nodes,direction]=False
+                deform_given[nodes,direction]=0.0
+        if 'F' in name: self.force_given.reshape(-1,2)[nodes]=0.0
+        if 'distributed' in name: self.distributed_force.reshape(-1,2)[nodes]=0.0
 
     def check_solved(self):
         if self.solved: 
             print('Conditions may have been changed! Please resubmit for new result.')
             self.sloved=False
     
+    def set_reordering(self,method='rcm'):
+        """
+        Order the free deform of the reduced system by reverse Cuthill-McKee numbering of nodes ('rcm'),
+        or keep the numbering of the mesh (None). It cuts the bandwidth and profile of reduced K,
+        which helps ILU preconditioners and factorizations without their own ordering.
+        Dense solvers ignore the numbering and SuperLU ('lu', sparse 'cholesky') orders columns itself,
+        so solve time barely changes with them (see benchmark/reordering.py).
+        Only the reduced system is permuted, node indexes, conditions and results keep the mesh numbering.
+        """
+        if method not in (None,'rcm'): raise ValueError(f'unknown reordering: {method}')
+        self.reordering=method
+        self.__node_rank=None
+
     #   submit preprocess
-    def preprocess(self):
-        self.init_global_system()
+    def preprocess(self,assemble=True):
+        self.__check_mesh_once()
+        if assemble:
+            self.init_global_system()
+        else:
+            self.init_global_vars()
+            self.init_elements_vars()
         self.__init_reduce_map()
         self.__set_vars_obj()
         self.__fix_given_condition()
 
     def __init_reduce_map(self):
-        self.deform_free_index=list()
-        self.deform_fix_index=list()
         self.__cal_reduce_map()
         self.len_reduce=len(self.deform_free_index)
     
     def __cal_reduce_map(self):
-        for node,_ in enumerate(self.nodes):
-            if node not in self.x_given:
-                self.deform_free_index.append(2*node)
-            else:
-                self.deform_fix_index.append(2*node)
-            if node not in self.y_given:
-                self.deform_free_index.append(2*node+1)
-            else:
-                self.deform_fix_index.append(2*node+1)
+        """free and fixed global deform indexes, int arrays, the free one is ordered by set_reordering."""
+        fixed=self.deform_fixed.copy()
+        fixed[self.__cal_orphan_dofs()]=True
+        self.deform_free_index=np.flatnonzero(~fixed)
+        self.deform_fix_index=np.flatnonzero(fixed)
+        if self.reordering is not None: self.deform_free_index=self.__reorder(self.deform_free_index)
+
+    def __cal_orphan_dofs(self):
+        """deform of nodes without element has no stiffness, it is kept fixed to make reduced K regular."""
+        orphan_nodes=quality.find_unused_nodes(len(self.nodes),self.elements)
+        return np.stack([2*orphan_nodes,2*orphan_nodes+1],axis=1).reshape(-1)
+
+    def __reorder(self,deform_index):
+        """sort deform indexes by rank of their nodes."""
+        node_rank=self.__get_node_rank()
+        return deform_index[np.argsort(2*node_rank[deform_index//2]+deform_index%2,kind='stable')]
+
+    def __get_node_rank(self):
+        if self.__node_rank is None or self.__node_rank[0] is not self.elements:
+            self.__node_rank=(self.elements,self.__cal_node_rank())
+        return self.__node_rank[1]
+
+    def __cal_node_rank(self):
+        order=csgraph.reverse_cuthill_mckee(self.__cal_node_graph(),symmetric_mode=True)
+        rank=np.empty(len(self.nodes),dtype=np.int64)
+        rank[order]=np.arange(len(order))
+        return rank
+
+    def __cal_node_graph(self):
+        """node adjacency of the mesh, sparse CSR (N,N)."""
+        rows=np.repeat(self.elements,3,axis=1).reshape(-1)
+        cols=np.tile(self.elements,(1,3)).reshape(-1)
+        data=np.ones(len(rows),dtype=np.int8)
+        return sparse.csr_matrix((data,(rows,cols)),shape=(len(self.nodes),len(self.nodes)))
+
+    def cal_reordering_report(self,factorize=False):
+        """
+        Sparsity of reduced K in mesh numbering and in the current order, after preprocess:
+        bandwidth, profile (nnz of the Cholesky factor of envelope solvers) and, if factorize,
+        factor_nnz of the solver chosen by set_solver (None for solvers without a factor, e.g. 'cg').
+        Return e.g. {'bandwidth':(before,after),'profile':(before,after)}.
+        """
+        report={'bandwidth':list(),'profile':list()}
+        if factorize: report['factor_nnz']=list()
+        for free_index in (np.sort(self.deform_free_index),self.deform_free_index):
+            K_reduce=self.K[free_index][:,free_index].tocsc() if self.sparse else self.K[np.ix_(free_index,free_index)]
+            K=sparse.csr_matrix(K_reduce)
+            rows,cols=K.nonzero()
+            report['bandwidth'].append(int(np.max(np.abs(rows-cols),initial=0)))
+            first=np.full(K.shape[0],K.shape[0])
+            np.minimum.at(first,rows,cols)
+            report['profile'].append(int(np.sum(np.maximum(np.arange(K.shape[0])-first,0))+K.shape[0]))
+            if factorize:
+                solver=copy.copy(self.get_solver())
+                solver.factorize(K_reduce)
+                report['factor_nnz'].append(solver.factor_nnz)
+        return {key:tuple(value) for key,value in report.items()}
     
     def __set_vars_obj(self):
-        self.deform_end=np.zeros_like(self.deform)
-        self.force_end=np.zeros_like(self.force)
-        for node,displace in self.x_given_displace.items():
-            self.deform_end[2*node]=displace
-        for node,displace in self.y_given_displace.items():
-            self.deform_end[2*node+1]=displace
-        for node,force in self.f_given.items():
-            self.force_end[2*node],self.force_end[2*node+1]=force
+        self.deform_end=np.where(self.deform_fixed,self.deform_given,0.0)
+        self.force_end=self.force_given+self.distributed_force
 
     def __fix_given_condition(self):
         self.deform_obj=self.deform_end
         self.force_obj=self.force_end
-        for i_global in self.deform_fix_index:
-            self.deform[i_global]=self.deform_obj[i_global]
+        self.deform[self.deform_fix_index]=self.deform_obj[self.deform_fix_index]
 
 
 class PostProcessor(kernel.ReducedSystem):
@@ -212,14 +491,21 @@ class PostProcessor(kernel.ReducedSystem):
     
     #   data dict for viewing and ploting
     def update_show_dict(self):
+        """Fill current_dict by the result, derived data calculated before are cleared."""
+        self.__reset_deformed_dict()
         self.__update_show_deform()
         self.__update_show_position()
         self.__update_show_force()
         self.__update_show_elements_vars()
 
+    def __reset_deformed_dict(self):
+        kinds=list(self.current_dict)+[kind for kind in DERIVED_FIELDS if kind not in self.current_dict]
+        self.current_dict={kind:DerivedFields(self,kind) for kind in kinds}
+
     def __update_show_deform(self):
-        self.current_dict['deform']['Ux']=self.deform.reshape(len(self.nodes),2).T[0]
-        self.current_dict['deform']['Uy']=self.deform.reshape(len(self.nodes),2).T[1]
+        deform=self.deform.reshape(-1,2)
+        self.current_dict['deform']['Ux']=deform[:,0]
+        self.current_dict['deform']['Uy']=deform[:,1]
     
     def __update_show_position(self):
         self.current_dict['position']['x']=self.reference_dict['position']['x']\
@@ -228,50 +514,81 @@ class PostProcessor(kernel.ReducedSystem):
             +self.current_dict['deform']['Uy']
 
     def __update_show_force(self):
-        self.current_dict['force']['Fx']=self.force.reshape(len(self.nodes),2).T[0]
-        self.current_dict['force']['Fy']=self.force.reshape(len(self.nodes),2).T[1]
+        force=self.force.reshape(-1,2)
+        self.current_dict['force']['Fx']=force[:,0]
+        self.current_dict['force']['Fy']=force[:,1]
 
     def __update_show_elements_vars(self):
-        strain_list=np.array(self.strain).T
-        stress_list=np.array(self.stress).T
+        """columns of strain and stress, views without copy."""
         for i,name in enumerate(('e11','e22','e12')):
-            self.current_dict['strain'][name]=strain_list[i]
+            self.current_dict['strain'][name]=self.strain[:,i]
         for i,name in enumerate(('S11','S22','S12')):
-            self.current_dict['stress'][name]=stress_list[i]
+            self.current_dict['stress'][name]=self.stress[:,i]
     
     def get_data(self,name,index):
-        """index can be node index or relement index."""
-        dict=self.current_dict[name]
-        return np.array([dict[key][index] for key in dict])
-    
-    def calculate(self,name):
-        """calculate useful variables, including Mises stress, ..."""
-        if name=='Mises':
-            self.__cal_Mises()
-        elif name=='Tresca':
-            self.__cal_Tresca()
-        else:
-            raise ValueError
+        """
+        index can be node index or element index, or an int array of them.
+        Return ndarray with components in rows.
+        """
+        if name in ('deform','force'):
+            return getattr(self,name).reshape(-1,2)[index].T
+        if name in ('strain','stress'):
+            return getattr(self,name)[index].T
+        return np.stack([data[index] for data in self.current_dict[name].values()])
 
-    def __cal_Mises(self):
-        s11=self.current_dict['stress']['S11']
-        s22=self.current_dict['stress']['S22']
-        s12=self.current_dict['stress']['S12']
-        Mises=np.sqrt(0.5*(s11**2+s22**2+(s11-s22)**2+6*s12**2))
-        self.current_dict['stress']['Mises']=Mises
+    def cal_nodal_average(self,values):
+        """area weighted average on nodes of element values, ndarray(shape=(E,) or (E,k))."""
+        incidence=self.node_incidence
+        weight=incidence@np.ones(incidence.shape[1])
+        weight[weight==0.0]=1.0
+        nodal=incidence@values
+        return nodal/weight if nodal.ndim==1 else nodal/weight[:,None]
 
-    def __cal_Tresca(self):
-        s11=self.current_dict['stress']['S11']
-        s22=self.current_dict['stress']['S22']
-        s12=self.current_dict['stress']['S12']
-        Tresca=np.sqrt((s11-s22)**2+4*s12**2)
-        self.current_dict['stress']['Tresca']=Tresca
+    def cal_original_nodal(self,values):
+        """
+        values of nodes, ndarray(shape=(N,...)) or deform-like (2N,), in the original numbering
+        before compact_mesh; merged nodes share the value, removed nodes get nan.
+        """
+        if self.node_map is None: return values
+        values=np.asarray(values)
+        per_node=values.shape[0]==2*len(self.nodes) and values.ndim==1
+        nodal=values.reshape(-1,2) if per_node else values
+        original=np.where((self.node_map>=0).reshape((-1,)+(1,)*(nodal.ndim-1)),
+            nodal[np.maximum(self.node_map,0)],np.nan)
+        return original.reshape(-1) if per_node else original
+
+    def average(self,name='stress'):
+        """
+        Smooth all element data of current_dict[name] (e.g. 'strain', 'stress') to nodes
+        by area weighted averaging, saved in current_dict['nodal_'+name] for gouraud plot.
+        A single component is averaged on access, e.g. current_dict['nodal_stress']['Mises'].
+        """
+        components=[component for component,data in self.current_dict[name].items() \
+            if len(data)==len(self.elements)]
+        values=np.stack([self.current_dict[name][component] for component in components],axis=1)
+        nodal=self.cal_nodal_average(values)
+        self.current_dict['nodal_'+name].update({component:nodal[:,i] for i,component in enumerate(components)})
+    
+    def calculate(self,name):
+        """
+        Calculate derived data by name and return it, including
+        stress: out-of-plane 'S33' (given by materials, 0 in plane stress or if a material does not define it), and with it
+        'Mises', 'Tresca', 'pressure', principal 'S1', 'S2' and 'Sangle' in the plane;
+        strain: equivalent 'eeq', principal 'e1', 'e2' and 'eangle';
+        energy: strain energy density 'SED'; reaction: 'RFx', 'RFy'.
+        They are also calculated on first access of current_dict[kind][name] and cached until next submit.
+        """
+        for kind,fields in DERIVED_FIELDS.items():
+            if name in fields: return self.current_dict[kind][name]
+        raise ValueError
 
 
 class PlotProcessor(kernel.ReducedSystem):
     def __init__(self, mesh):
         super().__init__(mesh)
         self.set_figsize()
+        self.set_plot_options()
+        self.__triangulations=dict()
 
     def set_figsize(self,figsize='small'):
         """figure size can be 'small', 'medium', 'large', 'verylarge', or (length,width)."""
@@ -285,155 +602,254 @@ class PlotProcessor(kernel.ReducedSystem):
             self.figsize=(16,16)
         else:
             self.figsize=figsize
+
+    def set_plot_options(self,label_limit=200,edge_limit=5000,output=None,dpi=100):
+        """
+        label_limit: on large mesh, node and element indexes are labeled for about label_limit of them,
+            None to label all;
+        edge_limit: mesh edges are not drawn over colored data if there are more elements, None to always draw;
+        output: directory of batch mode, where figures are rendered by Agg (no pyplot window)
+            and saved as PNG, e.g. fig_Ux.png; None to plot by pyplot.
+        """
+        self.label_limit=label_limit
+        self.edge_limit=edge_limit
+        self.plot_output=output
+        self.dpi=dpi
+        if output is not None: os.makedirs(output,exist_ok=True)
     
+    #   figure, triangulation and drawing shared by all plots
+    def __new_figure(self):
+        if self.plot_output is None:
+            figure=plt.figure(figsize=self.figsize)
+        else:
+            figure=render.new_agg_figure(self.figsize)
+        ax=figure.add_subplot()
+        ax.set_aspect('equal')
+        return figure,ax
+
+    def __finish_figure(self,figure,ax,title,filename):
+        """Return the PNG path in batch mode, None when plotting by pyplot (the figure is plt.gcf())."""
+        ax.set_title(title)
+        if self.plot_output is None: return None
+        path=os.path.join(self.plot_output,f'{filename}.png')
+        figure.savefig(path,dpi=self.dpi)
+        return path
+
+    def get_triangulation(self,deformed=False,magnification=None):
+        """
+        Triangulation of the reference mesh, or of the deformed mesh amplified by magnification.
+        It is cached until mesh or result (current_dict) changes.
+        """
+        if deformed: magnification=self.__get_magnification(magnification)
+        source=(self.nodes,self.elements,self.current_dict if deformed else None)
+        key=(deformed,magnification)
+        cached=self.__triangulations.get(key)
+        if cached is None or any(old is not new for old,new in zip(cached[0],source)):
+            self.__triangulations={key:value for key,value in self.__triangulations.items() \
+                if all(old is new for old,new in zip(value[0][:2],source[:2]))}
+            x,y=self.__amplify_deform(magnification) if deformed else self.nodes.T
+            cached=(source,tri.Triangulation(x,y,self.elements))
+            self.__triangulations[key]=cached
+        return cached[1]
+
+    def __draw_mesh(self,ax,triangulation,marker=True,color='k'):
+        render.draw_mesh(ax,triangulation.x,triangulation.y,triangulation.edges,marker,color)
+
     #   plot result figures
     def plot_mesh(self,node=True,element=False,deformed=False,magnification=None):
-        if not deformed:
-            self.__plot_undeformed_mesh(node,element)
-        else:
-            self.__plot_deformed_mesh(node,element,magnification)
-
-    def __plot_undeformed_mesh(self,node=True,element=False):
-        x=self.reference_dict['position']['x']
-        y=self.reference_dict['position']['y']
-        mesh_fig=tri.Triangulation(x,y,self.elements)
-        plt.figure(figsize=self.figsize)
-        plt.gca().set_aspect('equal')
-        plt.triplot(mesh_fig,'k.-',lw=1)
-        if node: self.__plot_node_index(x,y)
-        if element: self.__plot_element_index(x,y)
-        plt.title('Undeformed Mesh')
-    
-    def __plot_deformed_mesh(self,node=False,element=False,magnification=None):
-        x,y,magnification=self.__amplify_deform(magnification)
-        mesh_fig=tri.Triangulation(x,y,self.elements)
-        plt.figure(figsize=self.figsize)
-        plt.gca().set_aspect('equal')
-        plt.triplot(mesh_fig,'k.-',lw=1)
-        if node: self.__plot_node_index(x,y)
-        if element: self.__plot_element_index(x,y)
-        plt.title(f'Deformed Mesh \n(magnification = {magnification:.2e})')
+        figure,ax=self.__new_figure()
+        triangulation=self.get_triangulation(deformed,magnification)
+        self.__draw_mesh(ax,triangulation)
+        if node: self.__plot_node_index(ax,triangulation.x,triangulation.y)
+        if element: self.__plot_element_index(ax,triangulation.x,triangulation.y)
+        if not deformed: 
+            return self.__finish_figure(figure,ax,'Undeformed Mesh','fig_mesh')
+        magnification=self.__get_magnification(magnification)
+        return self.__finish_figure(figure,ax,f'Deformed Mesh \n(magnification = {magnification:.2e})',
+            'fig_deform_mesh')
 
     def __amplify_deform(self,magnification):
-        if not bool(magnification): magnification=self.__cal_magnification()
         x=self.reference_dict['position']['x']+magnification*self.current_dict['deform']['Ux']
         y=self.reference_dict['position']['y']+magnification*self.current_dict['deform']['Uy']
-        return x,y,magnification
+        return x,y
+
+    def __get_magnification(self,magnification):
+        return magnification if bool(magnification) else self.__cal_magnification()
     
     def __cal_magnification(self):
-        max_position=max(max(abs(self.reference_dict['position']['x'])),\
-            max(abs(self.reference_dict['position']['y'])))
-        max_deform=max(max(abs(self.current_dict['deform']['Ux'])),\
-            max(abs(self.current_dict['deform']['Uy'])))
+        max_position=np.max(np.abs(self.nodes))
+        max_deform=max(np.max(np.abs(self.current_dict['deform']['Ux'])),\
+            np.max(np.abs(self.current_dict['deform']['Uy'])))
         if max_deform>1e-10*max_position:
             magnification=0.1*max_position/max_deform
         else:
             magnification=0.0
         return magnification
+
+    def __label_indexes(self,number):
+        """all indexes, or evenly strided ones if there are more than label_limit."""
+        if self.label_limit is None or number<=self.label_limit: return np.arange(number)
+        return np.arange(0,number,int(np.ceil(number/self.label_limit)))
     
-    def __plot_node_index(self,x,y):
-        for index,_ in enumerate(self.nodes):
-            plt.annotate(index,(x[index],y[index]),color="red")
+    def __plot_node_index(self,ax,x,y):
+        for index in self.__label_indexes(len(self.nodes)).tolist():
+            ax.annotate(index,(x[index],y[index]),color="red")
     
-    def __plot_element_index(self,x,y):
-        for index,element in enumerate(self.elements):
-            x_mean=1/3*(x[element[0]]+x[element[1]]+x[element[2]])
-            y_mean=1/3*(y[element[0]]+y[element[1]]+y[element[2]])
-            plt.annotate(index,(x_mean,y_mean),xytext=(x_mean,y_mean))
+    def __plot_element_index(self,ax,x,y):
+        indexes=self.__label_indexes(len(self.elements))
+        x_mean=np.asarray(x)[self.elements[indexes]].mean(axis=1)
+        y_mean=np.asarray(y)[self.elements[indexes]].mean(axis=1)
+        for index,x_center,y_center in zip(indexes.tolist(),x_mean,y_mean):
+            ax.annotate(index,(x_center,y_center))
     
     def plot_restrict(self,fix=True,load=True,node=False,element=False):
-        x=self.reference_dict['position']['x']
-        y=self.reference_dict['position']['y']
-        mesh_fig=tri.Triangulation(x,y,self.elements)
-        plt.figure(figsize=self.figsize)
-        plt.gca().set_aspect('equal')
-        plt.triplot(mesh_fig,'k.-',lw=1)
-        if fix:
-            if bool(self.x_given): self.__plot_x_fix()
-            if bool(self.y_given): self.__plot_y_fix()
-        if load:
-            if bool(self.f_given): self.__plot_f_given()
-        if node: self.__plot_node_index(x,y)
-        if element: self.__plot_element_index(x,y)
-        plt.title('Load and Restrict')
-    
-    def __plot_x_fix(self):
-        x_fix_position=list()
-        for node in self.x_given:
-            x_fix_position.append(self.nodes[node])
-        x_fix_position=np.array(x_fix_position).T
-        x=x_fix_position[0]
-        y=x_fix_position[1]
-        plt.scatter(x,y,s=100,c='b',marker='>')
+        figure,ax=self.__new_figure()
+        triangulation=self.get_triangulation()
+        self.__draw_mesh(ax,triangulation)
+        render.draw_restrict(ax,*self.__get_restrict(fix,load))
+        if node: self.__plot_node_index(ax,triangulation.x,triangulation.y)
+        if element: self.__plot_element_index(ax,triangulation.x,triangulation.y)
+        return self.__finish_figure(figure,ax,'Load and Restrict','fig_restrict')
     
-    def __plot_y_fix(self):
-        y_fix_position=list()
-        for node in self.y_given:
-            y_fix_position.append(self.nodes[node])
-        y_fix_position=np.array(y_fix_position).T
-        x=y_fix_position[0]
-        y=y_fix_position[1]
-        plt.scatter(x,y,s=100,c='r',marker='^')
-    
-    def __plot_f_given(self):
-        magnification=self.__cal_force_arrow()
-        for node in self.f_given:
-            x,y=self.nodes[node]
-            dx=magnification*self.f_given[node][0]
-            dy=magnification*self.f_given[node][1]
-            head_width=0.3*max(abs(dx),abs(dy))
-            plt.arrow(x,y,dx,dy,head_width=head_width,fc='g',ec='g')
+    def __get_restrict(self,fix=True,load=True):
+        """positions of x and y fixed nodes, and (position, scaled force) of loads."""
+        x_fix,y_fix,loads=np.zeros((0,2)),np.zeros((0,2)),np.zeros((0,4))
+        forces=(self.force_given+self.distributed_force).reshape(-1,2)
+        nodes=np.flatnonzero(np.any(forces!=0.0,axis=1))
+        if fix:
+            x_fix=self.nodes[self.deform_fixed[0::2]]
+            y_fix=self.nodes[self.deform_fixed[1::2]]
+        if load and len(nodes):
+            forces=forces[nodes]
+            loads=np.concatenate([self.nodes[nodes],self.__cal_force_arrow(forces)*forces],axis=1)
+        return x_fix,y_fix,loads
     
-    def __cal_force_arrow(self):
-        max_position=max(max(abs(self.reference_dict['position']['x'])),\
-            max(abs(self.reference_dict['position']['y'])))
-        max_force=max([max(map(abs,value)) for value in self.f_given.values()])
+    def __cal_force_arrow(self,forces):
+        max_position=np.max(np.abs(self.nodes))
+        max_force=np.max(np.abs(forces))
         return 0.1*max_position/max_force
     
     def plot_material(self,node=False,element=False,deformed=False,magnification=None):
         self.__init_show_material()
-        self.__plot_color('material','color','flat',deformed,magnification,colorbar=False)
+        return self.__plot_color('material','color','flat',deformed,magnification,colorbar=False)
 
     def __init_show_material(self):
-        self.reference_dict['material']={'name':[],'color':[]}
+        name=np.empty(len(self.elements),dtype=object)
+        color=np.zeros(len(self.elements))
         material_color=dict() #name:color
-        for name in self.material_dict.values():
-            self.reference_dict['material']['name'].append(name)
-            if name not in material_color:
-                material_color.update({name:len(material_color)})
-            color=material_color[name]
-            self.reference_dict['material']['color'].append(color)
+        for material,element_indexes in sorted(self.material_groups,key=lambda group:group[1][0]):
+            if material.name not in material_color:
+                material_color.update({material.name:len(material_color)})
+            name[element_indexes]=material.name
+            color[element_indexes]=material_color[material.name]
+        self.reference_dict['material']={'name':name,'color':color}
     
     def plot(self,name,component='',node=False,element=False,deformed=True,magnification=None,colorbar=True):
         if name=='mesh':
-            self.plot_mesh(node,element,deformed,magnification)
+            return self.plot_mesh(node,element,deformed,magnification)
         elif name in ('deform','force'):
-            self.__plot_color(name,component,'gouraud',deformed,magnification,colorbar)
+            return self.__plot_color(name,component,'gouraud',deformed,magnification,colorbar)
         elif name in ('strain','stress'):
-            self.__plot_color(name,component,'flat',deformed,magnification,colorbar)
+            return self.__plot_color(name,component,'flat',deformed,magnification,colorbar)
         else:
-            show_data=self.current_dict[name][component]
-            if len(show_data)==len(self.nodes):
-                self.__plot_color(name,component,'gouraud',deformed,magnification,colorbar)
-            if len(show_data)==len(self.elements):
-                self.__plot_color(name,component,'flat',deformed,magnification,colorbar)
+            shading=self.__get_shading(name,self.current_dict[name][component])
+            if shading is not None:
+                return self.__plot_color(name,component,shading,deformed,magnification,colorbar)
     
+    def __get_shading(self,name,values):
+        """'gouraud' for nodal fields (deform, force, reaction, nodal_*), 'flat' for element fields."""
+        if name in ('position','deform','force','reaction') or name.startswith('nodal_'): return 'gouraud'
+        if name in ('strain','stress','energy') or len(values)==len(self.elements): return 'flat'
+        if len(values)==len(self.nodes): return 'gouraud'
+
     def __plot_color(self,name,component,shading,deformed,magnification,colorbar):
-        if not deformed:
-            x=self.reference_dict['position']['x']
-            y=self.reference_dict['position']['y']
-        else:
-            x,y,magnification=self.__amplify_deform(magnification)
+        if deformed: magnification=self.__get_magnification(magnification)
+        triangulation=self.get_triangulation(deformed,magnification)
         if name in self.current_dict.keys():
             z=self.current_dict[name][component]
         if name in self.reference_dict.keys():
             z=self.reference_dict[name][component]
-        fig=tri.Triangulation(x,y,self.elements)
-        plt.figure(figsize=self.figsize)
-        plt.gca().set_aspect('equal')
-        plt.tripcolor(fig,z,shading=shading)
-        plt.triplot(fig,lw=1)
-        if colorbar: plt.colorbar()
+        figure,ax=self.__new_figure()
+        mappable=render.draw_field(ax,triangulation,z,shading)
+        if self.__draw_edges(): self.__draw_mesh(ax,triangulation,marker=False,color='C0')
+        if colorbar: figure.colorbar(mappable,ax=ax)
         title=f'{name.capitalize()} ({component})'
         if deformed:  title+=f'\n(magnification = {magnification:.2e})'
-        plt.title(title)
\ No newline at end of file
+        return self.__finish_figure(figure,ax,title,self.__cal_filename(name,component))
+
+    def __draw_edges(self):
+        return self.edge_limit is None or len(self.elements)<=self.edge_limit
+
+    def __cal_filename(self,name,component):
+        if name in ('deform','force','strain','stress'): return f'fig_{component}'
+        if name=='material': return 'fig_material'
+        return f'fig_{name}_{component}'
+
+    #   export many figures at once
+    def export_figures(self,fields,out_dir,workers=1,deformed=True,magnification=None,dpi=None):
+        """
+        Save figures of fields as PNG in out_dir, rendered with Agg by a pool of workers processes.
+        fields: list of (name,component) like ('stress','S12'), a component like 'Ux' or 'Mises',
+            or 'mesh', 'restrict', 'material'; file names are those of batch mode (e.g. fig_S12.png).
+        Triangulation, magnification and colour limits are calculated once here for all figures.
+        Return export_log, the time of preparing, of rendering each figure and in total.
+        """
+        start=time.perf_counter()
+        os.makedirs(out_dir,exist_ok=True)
+        if deformed: magnification=self.__get_magnification(magnification)
+        shared=self.__get_export_shared(deformed,magnification,self.dpi if dpi is None else dpi)
+        jobs=[self.__get_export_job(field,out_dir,deformed,magnification) for field in fields]
+        prepare=time.perf_counter()-start
+        if workers==1:
+            render.init_export_worker(shared)
+            logs=list(map(render.render_job,jobs))
+        else:
+            with multiprocessing.Pool(workers,render.init_export_worker,(shared,)) as pool:
+                logs=pool.map(render.render_job,jobs)
+        self.export_log={'prepare':prepare,'figures':logs,'total':time.perf_counter()-start}
+        return self.export_log
+
+    def __get_export_shared(self,deformed,magnification,dpi):
+        reference=self.get_triangulation()
+        shared={'reference':(reference.x,reference.y),'deformed':None,'elements':self.elements,
+            'edges':reference.edges,'draw_edges':self.__draw_edges(),'figsize':self.figsize,'dpi':dpi}
+        if deformed:
+            triangulation=self.get_triangulation(True,magnification)
+            shared['deformed']=(triangulation.x,triangulation.y)
+        return shared
+
+    def __get_export_job(self,field,out_dir,deformed,magnification):
+        name,component=self.__find_field(field)
+        suffix=f'\n(magnification = {magnification:.2e})' if deformed else ''
+        job={'type':'field','deformed':deformed}
+        if name=='mesh':
+            title,filename=('Deformed Mesh '+suffix,'fig_deform_mesh') if deformed else ('Undeformed Mesh','fig_mesh')
+            job['type']='mesh'
+        elif name=='restrict':
+            title,filename='Load and Restrict','fig_restrict'
+            job['type'],job['deformed']='restrict',False
+            job['x_fix'],job['y_fix'],job['loads']=self.__get_restrict()
+        elif name=='material':
+            self.__init_show_material()
+            title,filename='Material (color)'+suffix,'fig_material'
+            job.update({'values':self.reference_dict['material']['color'],'shading':'flat','colorbar':False})
+        else:
+            values=np.asarray(self.current_dict[name][component])
+            title=f'{name.capitalize()} ({component})'+suffix
+            filename=self.__cal_filename(name,component)
+            shading=self.__get_shading(name,values)
+            job.update({'values':values,'shading':shading,'colorbar':True})
+        if job['type']=='field': job['limits']=(np.nanmin(job['values']),np.nanmax(job['values']))
+        job.update({'title':title,'path':os.path.join(out_dir,f'{filename}.png')})
+        return job
+
+    def __find_field(self,field):
+        """(name,component) of a field given by a tuple, a plot name or a component."""
+        if isinstance(field,tuple): return field
+        if field in ('mesh','restrict','material'): return field,''
+        for name,components in self.current_dict.items():
+            if field in components: return name,field
+        for name,components in DERIVED_FIELDS.items():
+            if field in components: return name,field
+        raise ValueError(f'unknown field: {field}')
+
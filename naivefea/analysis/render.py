@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+import matplotlib.tri as tri
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection,PolyCollection
+
+SHARED=dict() # mesh data shared by all figures rendered in a worker, set by init_export_worker
+
+
+def new_agg_figure(figsize):
+    """figure rendered by Agg without pyplot, safe in batch and in worker processes."""
+    figure=Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+def draw_mesh(ax,x,y,edges,marker=True,color='k'):
+    """every edge is drawn once by a LineCollection."""
+    xy=np.stack([x,y],axis=1)
+    ax.add_collection(LineCollection(xy[edges],colors=color,linewidths=1))
+    if marker: ax.plot(x,y,'.',color=color,linestyle='')
+    ax.autoscale_view()
+
+def draw_field(ax,triangulation,z,shading,limits=None):
+    """element data by a PolyCollection, node data by gouraud tripcolor."""
+    vmin,vmax=(None,None) if limits is None else limits
+    if shading=='gouraud': return ax.tripcolor(triangulation,z,shading='gouraud',vmin=vmin,vmax=vmax)
+    xy=np.stack([triangulation.x,triangulation.y],axis=1)
+    collection=PolyCollection(xy[triangulation.triangles],edgecolors='face')
+    collection.set_array(np.asarray(z))
+    collection.set_clim(vmin,vmax)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+def draw_restrict(ax,x_fix,y_fix,loads):
+    """x_fix, y_fix: positions (n,2) of fixed nodes; loads: (n,4) of position and scaled force."""
+    if len(x_fix): ax.scatter(x_fix[:,0],x_fix[:,1],s=100,c='b',marker='>')
+    if len(y_fix): ax.scatter(y_fix[:,0],y_fix[:,1],s=100,c='r',marker='^')
+    if len(loads): ax.quiver(*loads.T,angles='xy',scale_units='xy',scale=1,color='g')
+
+# export figures by a pool of workers
+def init_export_worker(shared):
+    """shared: positions of reference and deformed mesh, elements, edges, draw_edges, figsize and dpi."""
+    SHARED.clear()
+    SHARED.update(shared)
+    for name in ('reference','deformed'):
+        if shared[name] is not None:
+            SHARED[name+'_triangulation']=tri.Triangulation(*shared[name],shared['elements'])
+
+def render_job(job):
+    """render one figure described by job into job['path'], return its path and time."""
+    start=time.perf_counter()
+    figure=new_agg_figure(SHARED['figsize'])
+    ax=figure.add_subplot()
+    ax.set_aspect('equal')
+    position='deformed' if job['deformed'] else 'reference'
+    x,y=SHARED[position]
+    if job['type']=='field':
+        mappable=draw_field(ax,SHARED[position+'_triangulation'],job['values'],job['shading'],job['limits'])
+        if SHARED['draw_edges']: draw_mesh(ax,x,y,SHARED['edges'],marker=False,color='C0')
+        if job['colorbar']: figure.colorbar(mappable,ax=ax)
+    else:
+        draw_mesh(ax,x,y,SHARED['edges'])
+        if job['type']=='restrict': draw_restrict(ax,job['x_fix'],job['y_fix'],job['loads'])
+    ax.set_title(job['title'])
+    figure.savefig(job['path'],dpi=SHARED['dpi'])
+    return {'figure':job['path'],'seconds':time.perf_counter()-start}
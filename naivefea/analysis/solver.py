@@ -1,67 +1,97 @@
-from multiprocessing import Pool, Process, process
+from multiprocessing import Pool
 import multiprocessing
 from multiprocessing.shared_memory import SharedMemory
+import os
+import time
 import numpy as np
-import math
 
 from . import kernel
 
 
+PARTIAL_SHAPES={'strain':(3,),'stress':(3,),'force':(6,),'K_element':(6,6)}
+
+
+def init_worker(fea,shm_names):
+    """Run in each worker: keep the analysis and attach to the shared partial results."""
+    global worker_fea,worker_partials
+    worker_fea=fea
+    worker_partials={name:SharedMemory(shm_name) for name,shm_name in shm_names.items()}
+
+def worker_forward(element_indexes,tangent):
+    """Run in each worker: calculate a batch of elements into its own rows of the partials."""
+    results=worker_fea.cal_elements(element_indexes,tangent)
+    len_elements=len(worker_fea.elements)
+    for name,result in zip(PARTIAL_SHAPES,results):
+        if result is None: continue
+        shape=(len_elements,)+PARTIAL_SHAPES[name]
+        partial=np.ndarray(shape,np.float64,worker_partials[name].buf)
+        partial[element_indexes]=result
+
+
 class ParallelSupport(kernel.GlobalSystem):
     def __init__(self, mesh):
         super().__init__(mesh)
         self.processor_number=1
     
     def set_parallel(self,processor_number=None):
-        if bool(processor_number): processor_number=multiprocessing.cpu_count()
+        """use the given number of processors, or all of them if not given."""
+        if not bool(processor_number): processor_number=multiprocessing.cpu_count()
         self.processor_number=processor_number
 
-    def para_global_K(self):
-        self.shm_K=SharedMemory(create=True,size=self.K.nbytes)
-        self.K=np.ndarray(self.K.shape,self.K.dtype,self.shm_K.buf)
-        self.K[:]=0.0
-    
-    def para_global_force(self):
-        self.shm_force=SharedMemory(create=True,size=self.force.nbytes)
-        self.force=np.ndarray(self.force.shape,self.force.dtype,self.shm_force.buf)
-        self.force[:]=0.0
-    
     def cut_elements(self):
-        batch_size=math.ceil(len(self.elements)//self.processor_number)
-        self.__batch_list=[batch*batch_size for batch in range(self.processor_number)]
-        self.__batch_list.append(len(self.elements))
-        start=self.__batch_list[:-1]
-        end=self.__batch_list[1:]
-        return map(range,start,end)
-    
-    def para_forward(self):
-        self.para_global_force()
-        self.para_global_K()
-        element_indexes_list=self.cut_elements()
-        with Pool(self.processor_number) as pool:
-            pool.map(self.batch_forward,element_indexes_list)
-        self.unlink_share_memory()
+        """split all elements into one contiguous batch per processor."""
+        element_indexes=np.arange(len(self.elements))
+        return [batch for batch in np.array_split(element_indexes,self.processor_number) if len(batch)]
+
+    def para_forward(self,tangent=True):
+        """
+        Each worker writes the element results of its batch into separate rows of shared memory,
+        then the main process assembles all of them in element order, so the result is deterministic.
+        K_element is neither calculated nor shared if not tangent.
+        """
+        self.__init_partials(tangent)
+        try:
+            shm_names={name:shm.name for name,shm in self.__shm_partials.items()}
+            with Pool(self.processor_number,init_worker,(self,shm_names)) as pool:
+                pool.starmap(worker_forward,[(batch,tangent) for batch in self.cut_elements()])
+            self.assemble_elements(slice(None),*self.__read_partials(),tangent=tangent)
+        finally:
+            self.unlink_share_memory()
+
+    def __init_partials(self,tangent):
+        self.__shm_partials=dict()
+        for name,shape in PARTIAL_SHAPES.items():
+            if name=='K_element' and not tangent: continue
+            size=8*len(self.elements)*int(np.prod(shape))
+            self.__shm_partials[name]=SharedMemory(create=True,size=max(size,1))
+
+    def __read_partials(self):
+        partials=list()
+        for name,shape in PARTIAL_SHAPES.items():
+            if name not in self.__shm_partials:
+                partials.append(None) # K_element if not tangent
+                continue
+            shape=(len(self.elements),)+shape
+            partials.append(np.ndarray(shape,np.float64,self.__shm_partials[name].buf).copy())
+        return partials
 
     def unlink_share_memory(self):
-        self.K=self.K.copy()
-        self.force=self.force.copy()
-        self.shm_K.close()
-        self.shm_force.close()
-        self.shm_K.unlink()
-        self.shm_force.unlink()
-
-    def batch_forward(self,element_indexes):
-        shm_K=SharedMemory(self.shm_K.name)
-        self.K=np.ndarray(self.K.shape,self.K.dtype,shm_K.buf)
-        shm_force=SharedMemory(self.shm_force.name)
-        self.force=np.ndarray(self.force.shape,self.force.dtype,shm_force.buf)
-        super().forward(element_indexes)
-
-    def forward(self,element_indexes=None):
-        if self.processor_number==1 or bool(element_indexes)!=None:
-            super().forward(element_indexes)
+        for shm in self.__shm_partials.values():
+            shm.close()
+            shm.unlink()
+        self.__shm_partials=dict()
+
+    def __getstate__(self):
+        """Shared memory handles are not sent to workers."""
+        state=self.__dict__.copy()
+        state.pop('_ParallelSupport__shm_partials',None)
+        return state
+
+    def forward(self,element_indexes=None,tangent=True):
+        if self.processor_number==1 or element_indexes is not None or self.incremental:
+            super().forward(element_indexes,tangent)
         else:
-            self.para_forward()
+            self.para_forward(tangent)
 
 
 class LinearSolver(kernel.ReducedSystem,ParallelSupport):
@@ -80,16 +110,166 @@ class OneStepSolver(kernel.ReducedSystem,ParallelSupport):
         super().__init__(mesh)
         self.simplest=False
         self.solved=False
-        self.max_cycles=10
-        self.tolerent_error=1e-8
+        self.set_nonlinear_solver()
+
+    def set_nonlinear_solver(self,max_cycles=10,residual_tol=1e-8,energy_tol=1e-16,tolerent_error=None,
+        line_search=False,max_backtracks=4,reuse_tangent=1):
+        """
+        Newton-Raphson iteration converges when
+        residual norm relative to the first cycle (or to the norm of force if larger) is less than residual_tol, or
+        energy norm |ddeform*residual| relative to the first cycle is less than energy_tol, or
+        (if given) max(abs(ddeform)) is less than tolerent_error.
+        line_search: backtracking which halves the step (at most max_backtracks times) until residual decreases;
+        reuse_tangent: modified Newton, K is assembled and factorized only every reuse_tangent cycles.
+        Residual, step, assembly time and solve time of each cycle are recorded in iteration_log.
+        """
+        self.max_cycles=max_cycles
+        self.residual_tol=residual_tol
+        self.energy_tol=energy_tol
+        self.tolerent_error=tolerent_error
+        self.line_search=line_search
+        self.max_backtracks=max_backtracks
+        self.reuse_tangent=reuse_tangent
+        self.iteration_log=list()
 
     def slove(self):
-        for _ in range(self.max_cycles):
-            self.zero_global_K()
+        self.solved=False
+        self.iteration_log=list()
+        for cycle in range(self.max_cycles):
+            tangent=cycle%self.reuse_tangent==0
+            log={'cycle':cycle,'tangent':tangent}
+            start=time.perf_counter()
+            self.__assemble(tangent)
+            log['assembly_time']=time.perf_counter()-start
+            if self.incremental: log['updated_elements']=self.updated_elements
+            residual_norm=np.linalg.norm(self.cal_residual())
+            if cycle==0: self.__residual_0=residual_norm
+            log['residual']=self.__relative(residual_norm,self.__cal_force_scale())
+            if log['residual']<self.residual_tol:
+                self.__finish(log,converged=True)
+                break
+            start=time.perf_counter()
+            self.backward(factorize=tangent)
+            log['solve_time']=time.perf_counter()-start
+            if not self.solver_converged:
+                log['solver_converged']=False
+                self.__finish(log,converged=False)
+                break
+            if cycle==0: self.__energy_0=self.energy_norm
+            log['energy']=self.__relative(self.energy_norm,self.__energy_0)
+            log['alpha']=self.__line_search() if self.line_search else self.__update()
+            log['step']=log['alpha']*self.error
+            self.__finish(log,self.__step_converged(log))
+            if self.solved: break
+
+    def __assemble(self,tangent):
+        self.zero_global_force()
+        if tangent and not self.incremental: self.zero_global_K()
+        self.forward(tangent=tangent)
+
+    def __cal_force_scale(self):
+        """the first residual, unless external or internal force is larger."""
+        return max(self.__residual_0,np.linalg.norm(self.force_obj),np.linalg.norm(self.force))
+
+    def __relative(self,norm,norm_0):
+        return norm/norm_0 if norm_0>0.0 else 0.0
+
+    def __step_converged(self,log):
+        if log['energy']<self.energy_tol: return True
+        return self.tolerent_error is not None and log['step']<self.tolerent_error
+
+    def __finish(self,log,converged):
+        self.iteration_log.append(log)
+        self.solved=converged
+
+    def __update(self):
+        self.optimize()
+        return 1.0
+
+    def __line_search(self):
+        """backtracking from the full step until the residual norm decreases enough (Armijo condition)."""
+        residual_norm=self.residual_norm
+        deform=self.deform.copy()
+        alpha=1.0
+        for _ in range(self.max_backtracks):
+            self.optimize(alpha)
             self.zero_global_force()
-            self.forward()
-            self.backward()
-            self.optimize()
-            if self.error<self.tolerent_error: 
-                self.solved=True
-                break
\ No newline at end of file
+            self.forward(tangent=False)
+            if np.linalg.norm(self.cal_residual())<=(1.0-1e-4*alpha)*residual_norm: break
+            self.deform[:]=deform
+            alpha*=0.5
+        else:
+            self.optimize(alpha)
+        return alpha
+
+
+class IncrementalSolver(OneStepSolver):
+    def __init__(self, mesh):
+        super().__init__(mesh)
+        self.set_increment()
+        self.set_step_output()
+
+    def set_increment(self,initial=0.1,minimum=1e-4,maximum=1.0,cutback=0.5,growth=1.5,fast_cycles=3):
+        """
+        The load factor goes from 0 to 1 by increments, the first one is initial.
+        An unconverged increment is retried with cutback times of its size, and fails below minimum;
+        an increment converged within fast_cycles Newton solves makes the next one growth times larger, at most maximum.
+        """
+        self.increment_initial=initial
+        self.increment_minimum=minimum
+        self.increment_maximum=maximum
+        self.increment_cutback=cutback
+        self.increment_growth=growth
+        self.increment_fast_cycles=fast_cycles
+
+    def set_step_output(self,callback=None,directory=None):
+        """
+        After each converged increment, callback(fea,step,factor) is called and
+        (if directory is given) deform, force, strain and stress are saved to directory/step_{step}.npz.
+        """
+        self.step_callback=callback
+        self.step_directory=directory
+        if directory is not None: os.makedirs(directory,exist_ok=True)
+
+    def slove(self):
+        force_end=self.force_obj.copy()
+        deform_end=self.deform_obj.copy()
+        self.step_log=list()
+        factor=0.0
+        size=self.increment_initial
+        rate=np.zeros_like(self.deform) # d(deform)/d(factor) of last increment
+        while factor<1.0:
+            factor_new=min(factor+size,1.0)
+            if 1.0-factor_new<self.increment_minimum: factor_new=1.0
+            deform=self.deform.copy()
+            self.__apply_load(factor_new,force_end,deform_end,(factor_new-factor)*rate)
+            super().slove()
+            solves=sum('solve_time' in log for log in self.iteration_log)
+            self.step_log.append({'step':len(self.step_log),'factor':factor_new,
+                'cycles':len(self.iteration_log),'solves':solves,'solved':self.solved})
+            if self.solved:
+                rate=(self.deform-deform)/(factor_new-factor)
+                factor=factor_new
+                self.__output_step(factor)
+                if solves<=self.increment_fast_cycles: size*=self.increment_growth
+                size=min(size,self.increment_maximum)
+            else:
+                self.deform[:]=deform
+                size*=self.increment_cutback
+                if size<self.increment_minimum: break
+        self.force_obj=force_end
+        self.deform_obj=deform_end
+
+    def __apply_load(self,factor,force_end,deform_end,predictor):
+        """Warm start from the deform of last increment extrapolated by predictor, and move fixed deform to the new load."""
+        self.force_obj=factor*force_end
+        self.deform_obj=factor*deform_end
+        self.deform+=predictor
+        self.deform[self.deform_fix_index]=self.deform_obj[self.deform_fix_index]
+
+    def __output_step(self,factor):
+        step=sum(log['solved'] for log in self.step_log)-1
+        if self.step_callback is not None: self.step_callback(self,step,factor)
+        if self.step_directory is not None:
+            path=os.path.join(self.step_directory,f'step_{step}.npz')
+            np.savez(path,factor=factor,deform=self.deform,force=self.force,strain=self.strain,stress=self.stress)
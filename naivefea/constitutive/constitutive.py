@@ -16,11 +16,30 @@ class CommonMaterial2D:
         self.tensorform=False
         self.plane_stress=False
         self.use_flatten=False
+        self.constant_tangent=False
+        self.set_tangent()
     
     def set_name(self,name):
         """Set name of the material"""
         self.name=name      
 
+    def set_tangent(self,method='forward',diff=1e-3,function=None):
+        """
+        Choose how Jacobian is calculated:
+        'forward': forward difference with step diff (default);
+        'central': central difference with step adapted to the magnitude of strain;
+        'complex': complex step, cal_stress should accept complex strain;
+        'analytic': Jacobian=function(strain,*variables) given by user.
+        If constant_tangent is True (stress is linear in strain), Jacobian is calculated once and cached,
+        call set_tangent again after changing parameters of the material.
+        """
+        if method not in ('forward','central','complex','analytic'): raise ValueError
+        if method=='analytic' and function is None: raise ValueError
+        self.tangent_method=method
+        self.tangent_diff=diff
+        self.tangent_function=function
+        self.__Jacobian_cache=None
+
     def forward(self,strain,*variables,autograd=True):
         """
         Calculate stress by given strain and (optional) give the Jacobian of the increment.
@@ -31,6 +50,19 @@ class CommonMaterial2D:
         if autograd: self.cal_Jacobian()
         return self.stress
     
+    def forward_batch(self,strains,*variables,autograd=True):
+        """
+        Calculate stress of strains=ndarray(shape=(E,3)) and (optional) the Jacobian of each one.
+        Return stress ndarray(shape=(E,3)) and Jacobian ndarray(shape=(E,3,3)).
+        It loops over forward by default, override it to vectorize.
+        """
+        stress=np.zeros((len(strains),3))
+        Jacobian=np.zeros((len(strains),3,3))
+        for index,strain in enumerate(strains):
+            stress[index]=self.forward(strain,*variables,autograd=autograd)
+            if autograd: Jacobian[index]=self.Jacobian
+        return stress,Jacobian
+
     def cal_stress(self,strain,*variables):
         """
         Don't update self.stress and use member variables (self.strain and self.variables) in this function.
@@ -42,6 +74,18 @@ class CommonMaterial2D:
         else:
             return np.zeros_like(strain)
     
+    def cal_stress_batch(self,strains,*variables):
+        """cal_stress for ndarray(shape=(E,3)) of strain vectors, loops by default."""
+        return np.array([self.cal_stress(strain,*variables) for strain in strains]).reshape(-1,3)
+
+    def cal_S33_batch(self,strains,stress,*variables):
+        """
+        Out-of-plane stress S33 of each element, 0 in plane stress.
+        In plane strain it depends on the material; unless the material overrides this,
+        S33=0 is assumed there too, so Mises, Tresca and pressure are the in-plane ones.
+        """
+        return np.zeros(len(strains))
+
     def cal_sigma(self,epsilon,*variables):
         """Calculate stress tensor (sigma) by strain tensor (epsilon)."""
         return np.zeros_like(epsilon)
@@ -55,15 +99,54 @@ class CommonMaterial2D:
     def __cal_stress_vector(self,tensor):
         return np.array([tensor[0,0],tensor[1,1],tensor[0,1]])
     
-    def cal_Jacobian(self,diff=1e-3):
-        self.Jacobian=np.zeros((3,3))
+    def cal_Jacobian(self,diff=None):
+        strain=np.reshape(self.strain,(1,3))
+        stress=np.reshape(self.stress,(1,3))
+        self.Jacobian=self.cal_Jacobian_batch(strain,stress,*self.variables,diff=diff)[0]
+
+    def cal_Jacobian_batch(self,strains,stress,*variables,diff=None):
+        """Jacobian of each strain by the method of set_tangent, ndarray(shape=(E,3,3))."""
+        if self.constant_tangent:
+            if self.__Jacobian_cache is None:
+                self.__Jacobian_cache=self.__cal_tangent(strains[:1],stress[:1],variables,diff)[0]
+            return np.broadcast_to(self.__Jacobian_cache,(len(strains),3,3))
+        return self.__cal_tangent(strains,stress,variables,diff)
+
+    def __cal_tangent(self,strains,stress,variables,diff):
+        if diff is None: diff=self.tangent_diff
+        if self.tangent_method=='analytic':
+            Jacobian=[self.tangent_function(strain,*variables) for strain in strains]
+            return np.array(Jacobian,dtype=float).reshape(-1,3,3)
+        Jacobian=np.zeros((len(strains),3,3))
         for component in range(3):
-            dstrain=np.zeros(3)
-            dstrain[component]=diff
-            strain_new = self.strain+dstrain
-            stress_new=self.cal_stress(strain_new,*self.variables)
-            dstress=stress_new-self.stress
-            self.Jacobian[component]=dstress/diff
+            if self.tangent_method=='forward':
+                Jacobian[:,:,component]=self.__forward_difference(strains,stress,variables,component,diff)
+            elif self.tangent_method=='central':
+                Jacobian[:,:,component]=self.__central_difference(strains,variables,component)
+            else:
+                Jacobian[:,:,component]=self.__complex_step(strains,variables,component)
+        return Jacobian
+
+    def __forward_difference(self,strains,stress,variables,component,diff):
+        strains_new=strains.copy()
+        strains_new[:,component]+=diff
+        return (self.cal_stress_batch(strains_new,*variables)-stress)/diff
+
+    def __central_difference(self,strains,variables,component):
+        """step is cbrt(machine epsilon) times the magnitude of strain, which balances truncation and round-off."""
+        scale=np.maximum(np.abs(strains[:,component]),np.linalg.norm(strains,axis=1))
+        step=np.cbrt(np.finfo(float).eps)*np.maximum(scale,1e-8)
+        strains_forward=strains.copy()
+        strains_forward[:,component]+=step
+        strains_backward=strains.copy()
+        strains_backward[:,component]-=step
+        dstress=self.cal_stress_batch(strains_forward,*variables)-self.cal_stress_batch(strains_backward,*variables)
+        return dstress/(2.0*step[:,None])
+
+    def __complex_step(self,strains,variables,component,step=1e-20):
+        strains_new=strains.astype(complex)
+        strains_new[:,component]+=1j*step
+        return np.imag(self.cal_stress_batch(strains_new,*variables))/step
 
 
 class LinearElastic(CommonMaterial2D):
@@ -76,6 +159,7 @@ class LinearElastic(CommonMaterial2D):
         super().__init__()
         self.E=E 
         self.nv=nv 
+        self.constant_tangent=True
         self.cal_D()
 
     def cal_D(self):
@@ -100,6 +184,15 @@ class LinearElastic(CommonMaterial2D):
     def cal_Jacobian(self):
         self.Jacobian=self.D
 
+    def forward_batch(self,strains,*variables,autograd=True):
+        stress=strains@self.D.T
+        Jacobian=np.broadcast_to(self.D,(len(strains),3,3))
+        return stress,Jacobian
+
+    def cal_S33_batch(self,strains,stress,*variables):
+        if self.plane_stress: return np.zeros(len(strains))
+        return self.nv*(stress[:,0]+stress[:,1])
+
 
 class TensorHookean(CommonMaterial2D):
     """
@@ -111,6 +204,7 @@ class TensorHookean(CommonMaterial2D):
         self.mu=mu
         self.kappa=kappa
         self.tensorform=True
+        self.constant_tangent=True
     
     @tensorflatten
     def cal_sigma(self, epsilon, *variables):
@@ -118,12 +212,32 @@ class TensorHookean(CommonMaterial2D):
         lamda=self.kappa-2.0/3.0*self.mu
         return 2.0*self.mu*epsilon+lamda*trace*np.eye(3)
 
+    def forward_batch(self,strains,*variables,autograd=True):
+        stress=self.cal_stress_batch(strains,*variables)
+        Jacobian=self.cal_Jacobian_batch(strains,stress,*variables) if autograd else None
+        return stress,Jacobian
+
+    def cal_stress_batch(self,strains,*variables):
+        """cal_sigma for ndarray(shape=(E,3)) of strain vectors, in plane strain (epsilon33=0) as tensorflatten."""
+        epsilon=np.zeros((len(strains),3,3),dtype=strains.dtype)
+        epsilon[:,0,0]=strains[:,0]
+        epsilon[:,1,1]=strains[:,1]
+        epsilon[:,0,1]=epsilon[:,1,0]=0.5*strains[:,2]
+        trace=np.trace(epsilon,axis1=1,axis2=2)
+        lamda=self.kappa-2.0/3.0*self.mu
+        sigma=2.0*self.mu*epsilon+lamda*trace[:,None,None]*np.eye(3)
+        return np.stack([sigma[:,0,0],sigma[:,1,1],sigma[:,0,1]],axis=1)
+
+    def cal_S33_batch(self,strains,stress,*variables):
+        """in plane strain (epsilon33=0), S33=lamda*trace(epsilon)."""
+        return (self.kappa-2.0/3.0*self.mu)*(strains[:,0]+strains[:,1])
+
 
 class OtherMaterial(CommonMaterial2D):
     """
     Constitutive relationship of other material, you can define it by yourself.
     You should difine: 
     1. cal_stress(strain,*variables) or cal_sigma(epsilon,*variables) in tensor form;
-    2. (optional) cal_Jacobian(strain,*variables).
+    2. (optional) cal_Jacobian(strain,*variables), or choose a method by set_tangent.
     """
     pass
\ No newline at end of file
@@ -1,4 +1,7 @@
-from .element import SimpleTriangleElement,TriangleElement
+from .element import SimpleTriangleElement,TriangleElement,\
+    SimpleTriangleElementBatch,TriangleElementBatch
 
 __all__=['SimpleTriangleElement',
-'TriangleElement']
+'TriangleElement',
+'SimpleTriangleElementBatch',
+'TriangleElementBatch']
@@ -77,4 +77,81 @@ class SimpleTriangleElement(TriangleElement):
     
     def element_integrate(self):
         self.K_element=0.5*self.double_area*self.B.T@self.material.D@self.B
-        
\ No newline at end of file
+        
+
+class CommonTriangleElementBatch:
+    """plane triangle elements calculated together"""
+    def __init__(self, positions, geometry=None):
+        """
+        postions=ndarray(shape=(E,3,2)), nodal positions of E elements;
+        geometry=(double_area,B) is reused instead of calculating from positions.
+        """
+        if geometry is None:
+            self.x=positions[:,:,0].T
+            self.y=positions[:,:,1].T
+            self.double_area=self.__cal_area_2()
+            self.B=self.__cal_B()
+        else:
+            self.double_area,self.B=geometry
+
+    def set_deform(self,deform_elements):
+        """deform_elements=ndarray(shape=(E,6))"""
+        self.deform_element=deform_elements
+
+    def __cal_area_2(self):
+        x=self.x
+        y=self.y
+        det=(x[1]-x[0])*(y[2]-y[0])-(x[2]-x[0])*(y[1]-y[0])
+        return abs(det)
+
+    def __cal_B(self):
+        x=self.x
+        y=self.y
+        B=np.zeros((len(self.double_area),3,6))
+        B[:,0,0::2]=np.stack([y[1]-y[2],y[2]-y[0],y[0]-y[1]],axis=1)
+        B[:,1,1::2]=np.stack([x[2]-x[1],x[0]-x[2],x[1]-x[0]],axis=1)
+        B[:,2,0::2]=B[:,1,1::2]
+        B[:,2,1::2]=B[:,0,0::2]
+        return B/self.double_area[:,None,None]
+
+class TriangleElementBatch(CommonTriangleElementBatch):
+    """plane triangle elements of one general elastic material"""
+    def __init__(self, material, positions, geometry=None):
+        super().__init__(positions, geometry)
+        self.material=material
+
+    def forward(self,tangent=True):
+        """K_element is calculated only if tangent, otherwise strain, stress and force."""
+        self.cal_strain()
+        self.cal_stress(autograd=tangent)
+        if tangent: self.cal_Jacobian()
+        self.cal_force()
+
+    def cal_strain(self):
+        self.strain=np.einsum('eij,ej->ei',self.B,self.deform_element)
+
+    def cal_stress(self,autograd=False):
+        self.stress,self.Jacobian=self.material.forward_batch(self.strain,autograd=autograd)
+
+    def cal_Jacobian(self):
+        self.element_integrate()
+
+    def element_integrate(self):
+        self.K_element=self.integrate(self.Jacobian)
+
+    def integrate(self,D):
+        """D=ndarray(shape=(3,3) or (E,3,3))"""
+        DB=np.matmul(D,self.B)
+        return 0.5*self.double_area[:,None,None]*np.einsum('eki,ekj->eij',self.B,DB)
+
+    def cal_force(self):
+        self.force=0.5*self.double_area[:,None]*np.einsum('eki,ek->ei',self.B,self.stress)
+
+
+class SimpleTriangleElementBatch(TriangleElementBatch):
+    """plane triangle elements of one linear elastic material"""
+    def cal_stress(self,autograd=False):
+        self.stress=self.strain@self.material.D.T
+
+    def element_integrate(self):
+        self.K_element=self.integrate(self.material.D)
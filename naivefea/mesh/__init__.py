@@ -0,0 +1,9 @@
+from .mesh import Mesh
+from .reader import AbaqusReader,GmshReader,read
+from .quality import check_mesh
+
+__all__=['Mesh',
+'AbaqusReader',
+'GmshReader',
+'read',
+'check_mesh']
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class Mesh:
+    """
+    Minimal mesh container compatible with the meshio attributes used by naivefea.
+    points: ndarray(shape=(N,dim)); cells_dict: {cell type: ndarray(shape=(E,n))};
+    point_sets: {name: node indexes}; cell_sets: {name: indexes of 'triangle' cells}.
+    All indexes are zero based.
+    """
+    def __init__(self,points,cells_dict,point_sets=None,cell_sets=None):
+        self.points=points
+        self.cells_dict=cells_dict
+        self.point_sets=dict() if point_sets is None else point_sets
+        self.cell_sets=dict() if cell_sets is None else cell_sets
+
+    def __repr__(self):
+        cells=', '.join(f'{name}: {len(cells)}' for name,cells in self.cells_dict.items())
+        return f'<naivefea mesh: {len(self.points)} points, cells {{{cells}}}, '\
+            f'{len(self.point_sets)} point sets, {len(self.cell_sets)} cell sets>'
+
+
+def get_mesh_sets(mesh,cell_type='triangle'):
+    """
+    node sets and element sets (indexes of cell_type cells) of a naivefea or meshio mesh.
+    meshio stores cell sets per cell block, those of cell_type blocks are concatenated.
+    """
+    node_sets={name:np.asarray(indexes,dtype=np.int64).reshape(-1)
+        for name,indexes in getattr(mesh,'point_sets',dict()).items()}
+    element_sets=dict()
+    for name,indexes in getattr(mesh,'cell_sets',dict()).items():
+        if isinstance(indexes,list): indexes=_merge_cell_blocks(mesh,indexes,cell_type)
+        element_sets[name]=np.asarray(indexes,dtype=np.int64).reshape(-1)
+    return node_sets,element_sets
+
+def _merge_cell_blocks(mesh,block_indexes,cell_type):
+    merged=list()
+    offset=0
+    for block,indexes in zip(mesh.cells,block_indexes):
+        if block.type!=cell_type: continue
+        if indexes is None: indexes=[]
+        merged.append(offset+np.asarray(indexes,dtype=np.int64).reshape(-1))
+        offset+=len(block.data)
+    return np.concatenate(merged) if merged else np.zeros(0,dtype=np.int64)
+
+def find_boundary_edges(nodes,elements):
+    """
+    edges used by only one triangle, ndarray(shape=(n,2)) of node indexes, each directed
+    with its triangle on the left, so that (dy,-dx) of an edge is its outward normal.
+    """
+    positions=nodes[elements]
+    edge_1,edge_2=positions[:,1]-positions[:,0],positions[:,2]-positions[:,0]
+    clockwise=edge_1[:,0]*edge_2[:,1]-edge_1[:,1]*edge_2[:,0]<0
+    edges=elements[:,[0,1,1,2,2,0]].reshape(-1,2).astype(np.int64)
+    edges=np.where(np.repeat(clockwise,3)[:,None],edges[:,::-1],edges)
+    keys=edges.min(axis=1)*len(nodes)+edges.max(axis=1)
+    _,index,counts=np.unique(keys,return_index=True,return_counts=True)
+    return edges[np.sort(index[counts==1])]
@@ -0,0 +1,90 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.spatial import cKDTree
+
+DEGENERATE_TOL=1e-12 # relative to the squared longest edge
+
+
+def cal_element_quality(nodes,elements):
+    """
+    Quality of all triangles in one vectorized pass, return a dict of ndarray(shape=(E,)):
+    'signed_area' (negative for clockwise, i.e. inverted, elements),
+    'aspect_ratio' (circumradius over twice the inradius, 1 for equilateral, inf for degenerate),
+    'min_angle' (degree) and 'max_edge'.
+    """
+    positions=nodes[elements]
+    x=positions[:,:,0].T
+    y=positions[:,:,1].T
+    signed_area=0.5*((x[1]-x[0])*(y[2]-y[0])-(x[2]-x[0])*(y[1]-y[0]))
+    edge=np.stack([np.hypot(x[2]-x[1],y[2]-y[1]),np.hypot(x[0]-x[2],y[0]-y[2]),np.hypot(x[1]-x[0],y[1]-y[0])])
+    area=np.abs(signed_area)
+    with np.errstate(divide='ignore',invalid='ignore'):
+        aspect_ratio=np.where(area>0,np.prod(edge,axis=0)*np.sum(edge,axis=0)/(16*area**2),np.inf)
+        cos_angle=(np.roll(edge,1,axis=0)**2+np.roll(edge,2,axis=0)**2-edge**2)\
+            /(2*np.roll(edge,1,axis=0)*np.roll(edge,2,axis=0))
+    angle=np.degrees(np.arccos(np.clip(np.nan_to_num(cos_angle,nan=1.0),-1.0,1.0)))
+    return {'signed_area':signed_area,'aspect_ratio':aspect_ratio,
+        'min_angle':angle.min(axis=0),'max_edge':edge.max(axis=0)}
+
+def find_duplicate_nodes(nodes,tol=None):
+    """
+    pairs (i,j), i<j, of nodes closer than tol, ndarray(shape=(n,2)), found by a KD-tree.
+    tol defaults to 1e-9 of the diagonal of the bounding box.
+    """
+    if tol is None: tol=1e-9*np.hypot(*np.ptp(nodes,axis=0)) if len(nodes) else 0.0
+    pairs=cKDTree(nodes).query_pairs(tol,output_type='ndarray')
+    return pairs[np.lexsort(pairs.T[::-1])]
+
+def find_unused_nodes(len_nodes,elements):
+    """indexes of nodes referenced by none of elements."""
+    return np.flatnonzero(np.bincount(elements.reshape(-1),minlength=len_nodes)==0)
+
+def check_mesh(nodes,elements,tol=None):
+    """
+    Validate a triangle mesh, return the element quality of cal_element_quality and
+    'inverted', 'degenerate' (element indexes), 'duplicate_nodes' (node pairs, see find_duplicate_nodes),
+    'unused_nodes' and 'orphan_dofs' (global deform indexes of nodes stiffened by no element).
+    Raise ValueError if elements refer to nodes that do not exist.
+    """
+    elements=np.asarray(elements)
+    if elements.size and (elements.min()<0 or elements.max()>=len(nodes)):
+        raise ValueError(f'elements refer to nodes out of range 0..{len(nodes)-1}')
+    report=cal_element_quality(nodes,elements)
+    degenerate=np.abs(report['signed_area'])<=0.5*DEGENERATE_TOL*report['max_edge']**2
+    report['degenerate']=np.flatnonzero(degenerate)
+    report['inverted']=np.flatnonzero((report['signed_area']<0)&~degenerate)
+    report['duplicate_nodes']=find_duplicate_nodes(nodes,tol)
+    report['unused_nodes']=find_unused_nodes(len(nodes),elements)
+    orphan_nodes=find_unused_nodes(len(nodes),elements[~degenerate])
+    report['orphan_dofs']=np.stack([2*orphan_nodes,2*orphan_nodes+1],axis=1).reshape(-1)
+    return report
+
+def fix_orientation(elements,inverted):
+    """copy of elements with inverted ones renumbered counterclockwise (the last two nodes swapped)."""
+    elements=np.array(elements)
+    elements[np.ix_(inverted,[1,2])]=elements[np.ix_(inverted,[2,1])]
+    return elements
+
+def cal_node_compaction(nodes,elements,merge=True,remove_unused=True,tol=None):
+    """
+    Merge duplicate nodes (see find_duplicate_nodes) into the one of the smallest index and
+    remove nodes referenced by no element. Return kept (original index of each kept node) and
+    node_map (new index of each original node, -1 for removed), so that nodes[kept] and node_map[elements]
+    are the compacted mesh.
+    """
+    len_nodes=len(nodes)
+    representative=np.arange(len_nodes)
+    if merge:
+        pairs=find_duplicate_nodes(nodes,tol)
+        graph=sparse.csr_matrix((np.ones(len(pairs)),(pairs[:,0],pairs[:,1])),shape=(len_nodes,len_nodes))
+        _,labels=csgraph.connected_components(graph,directed=False)
+        first=np.full(labels.max(initial=-1)+1,len_nodes)
+        np.minimum.at(first,labels,representative)
+        representative=first[labels]
+    keep=representative==np.arange(len_nodes)
+    if remove_unused: keep&=np.bincount(representative[elements.reshape(-1)],minlength=len_nodes)>0
+    kept=np.flatnonzero(keep)
+    new_index=np.full(len_nodes,-1,dtype=np.int64)
+    new_index[kept]=np.arange(len(kept))
+    return kept,new_index[representative]
@@ -0,0 +1,308 @@
+import os
+import itertools
+
+import numpy as np
+
+from .mesh import Mesh
+
+
+class CommonReader:
+    """
+    Streaming mesh reader.
+    Data lines are gathered in chunks of chunk_size lines and every chunk is parsed
+    by numpy at once, so only one chunk of text is held in memory.
+    """
+    def __init__(self,chunk_size=65536):
+        self.chunk_size=chunk_size
+        self.lines_read=0
+
+    def read(self,filename):
+        with open(filename) as file:
+            return self.read_stream(file)
+
+    def read_stream(self,file):
+        return Mesh(np.zeros((0,2)),dict())
+
+    def parse_chunk(self,lines,dtype=np.float64):
+        """parse comma or space separated numbers of the lines into a flat array."""
+        text=''.join(lines).replace(',',' ')
+        return np.fromstring(text,dtype=dtype,sep=' ')
+
+    def cal_index_map(self,labels):
+        """sorted labels and their indexes, for look up by search_index."""
+        order=np.argsort(labels,kind='stable')
+        sorted_labels=labels[order]
+        if len(sorted_labels)>1 and np.any(sorted_labels[1:]==sorted_labels[:-1]):
+            raise ValueError('duplicate labels in mesh file')
+        return sorted_labels,order
+
+    def search_index(self,index_map,labels,strict=True):
+        """zero based indexes of labels, -1 for unknown labels unless strict."""
+        sorted_labels,order=index_map
+        labels=np.asarray(labels,dtype=np.int64)
+        position=np.searchsorted(sorted_labels,labels)
+        found=position<len(sorted_labels)
+        found[found]=sorted_labels[position[found]]==labels[found]
+        if strict and not np.all(found):
+            raise ValueError(f'unknown labels in mesh file: {labels[~found][:10]}')
+        indexes=np.full(labels.shape,-1,dtype=np.int64)
+        indexes[found]=order[position[found]]
+        return indexes
+
+
+class AbaqusReader(CommonReader):
+    """
+    Reader of Abaqus input file (.inp).
+    *Node, *Element, *Nset and *Elset blocks are read, including the generate option,
+    the nset/elset option of *Node/*Element and sets given by names of other sets.
+    Labels are assumed to be unique in the file (one part or one instance),
+    a set defined again with the same name (e.g. in the assembly) replaces the former one.
+    Element sets only keep triangle elements, as analysis uses triangles.
+    """
+    TRIANGLES={'CPS3','CPE3','CAX3','CPS3T','CPE3T','CPE3H','CGAX3','S3','S3R','STRI3',
+        'M3D3','R3D3','DC2D3','DS3','SFM3D3'}
+
+    def read_stream(self,file):
+        self.__init_data()
+        keyword,options,lines=None,dict(),list()
+        for line in file:
+            self.lines_read+=1
+            if line.startswith('*'):
+                if line.startswith('**'): continue
+                self.__parse_block(keyword,options,lines)
+                keyword,options=self.__parse_keyword(line)
+                lines=list()
+            elif keyword in ('node','element','nset','elset'):
+                if not line.strip(): continue
+                lines.append(line)
+                if len(lines)>=self.chunk_size and keyword in ('node','element'):
+                    self.__parse_block(keyword,options,lines)
+                    lines=list()
+        self.__parse_block(keyword,options,lines)
+        return self.__cal_mesh()
+
+    def __init_data(self):
+        self.__node_chunks=list()
+        self.__element_chunks=dict() #cell type:[(labels,connectivity)]
+        self.__node_sets=dict() #name:[labels]
+        self.__element_sets=dict()
+
+    def __parse_keyword(self,line):
+        words=[word.strip() for word in line[1:].split(',')]
+        options=dict()
+        for word in words[1:]:
+            if not word: continue
+            key,_,value=word.partition('=')
+            options[key.strip().lower()]=value.strip() if value else True
+        return words[0].lower(),options
+
+    def __parse_block(self,keyword,options,lines):
+        if not lines: return
+        if keyword=='node': self.__parse_nodes(options,lines)
+        elif keyword=='element': self.__parse_elements(options,lines)
+        elif keyword=='nset': self.__parse_set(self.__node_sets,options['nset'],options,lines)
+        elif keyword=='elset': self.__parse_set(self.__element_sets,options['elset'],options,lines)
+
+    def __parse_nodes(self,options,lines):
+        columns=self.__count_columns(lines[0])
+        data=self.parse_chunk(lines).reshape(-1,columns)
+        labels=data[:,0].astype(np.int64)
+        self.__node_chunks.append((labels,data[:,1:]))
+        if 'nset' in options: self.__add_to_set(self.__node_sets,options['nset'],labels)
+
+    def __parse_elements(self,options,lines):
+        columns=self.__count_columns(lines[0])
+        data=self.parse_chunk(lines,np.int64).reshape(-1,columns)
+        cell_type=options.get('type','').upper()
+        cell_type='triangle' if cell_type in self.TRIANGLES else cell_type.lower()
+        self.__element_chunks.setdefault(cell_type,list()).append((data[:,0],data[:,1:]))
+        if 'elset' in options: self.__add_to_set(self.__element_sets,options['elset'],data[:,0])
+
+    def __count_columns(self,line):
+        return len([word for word in line.split(',') if word.strip()])
+
+    def __parse_set(self,sets,name,options,lines):
+        words=''.join(lines).replace(',',' ').split()
+        try:
+            labels=np.array(words).astype(np.int64)
+        except ValueError:
+            labels=np.concatenate([np.array([word],dtype=np.int64) if word.lstrip('-').isdigit() \
+                else self.__get_set(sets,word) for word in words])
+        if options.get('generate',False):
+            labels=np.concatenate([np.arange(start,end+1,step) for start,end,step in labels.reshape(-1,3)])
+        sets[name]=[labels]
+
+    def __get_set(self,sets,name):
+        if name not in sets: raise ValueError(f'unknown set in mesh file: {name}')
+        return np.concatenate(sets[name])
+
+    def __add_to_set(self,sets,name,labels):
+        sets.setdefault(name,list()).append(np.asarray(labels,dtype=np.int64))
+
+    def __cal_mesh(self):
+        if not self.__node_chunks: raise ValueError('no *Node block in mesh file')
+        node_labels=np.concatenate([labels for labels,_ in self.__node_chunks])
+        points=np.concatenate([points for _,points in self.__node_chunks])
+        node_map=self.cal_index_map(node_labels)
+        cells_dict=dict()
+        for cell_type,chunks in self.__element_chunks.items():
+            connectivity=np.concatenate([connectivity for _,connectivity in chunks])
+            cells_dict[cell_type]=self.search_index(node_map,connectivity).astype(np.int32)
+        point_sets={name:np.unique(self.search_index(node_map,np.concatenate(labels)))
+            for name,labels in self.__node_sets.items()}
+        return Mesh(points,cells_dict,point_sets,self.__cal_cell_sets())
+
+    def __cal_cell_sets(self):
+        chunks=self.__element_chunks.get('triangle',list())
+        if not chunks: return dict()
+        element_map=self.cal_index_map(np.concatenate([labels for labels,_ in chunks]))
+        cell_sets=dict()
+        for name,labels in self.__element_sets.items():
+            indexes=self.search_index(element_map,np.concatenate(labels),strict=False)
+            cell_sets[name]=np.unique(indexes[indexes>=0])
+        return cell_sets
+
+
+class GmshReader(CommonReader):
+    """
+    Reader of ASCII Gmsh file (.msh), format version 2.2 and 4.1.
+    Every physical group gives a point set (nodes of its elements),
+    physical groups of triangles also give a cell set.
+    Sets are named by the physical name, or the physical tag if unnamed.
+    """
+    CELL_TYPES={1:'line',2:'triangle',3:'quad',4:'tetra',8:'line3',9:'triangle6',15:'vertex'}
+
+    def read_stream(self,file):
+        self.__file=file
+        self.__physical_names=dict() #(dim,tag):name
+        self.__entity_physicals=dict() #(dim,tag):[physical tags]
+        self.__version='4.1'
+        node_chunks,element_chunks=list(),list()
+        for line in self.__lines():
+            section=line.strip()
+            if section=='$MeshFormat': self.__parse_format()
+            elif section=='$PhysicalNames': self.__parse_physical_names()
+            elif section=='$Entities': self.__parse_entities()
+            elif section=='$Nodes': node_chunks=self.__parse_nodes()
+            elif section=='$Elements': element_chunks=self.__parse_elements()
+        return self.__cal_mesh(node_chunks,element_chunks)
+
+    def __lines(self):
+        for line in self.__file:
+            self.lines_read+=1
+            yield line
+
+    def __next_line(self):
+        self.lines_read+=1
+        return next(self.__file)
+
+    def __take(self,number):
+        lines=list(itertools.islice(self.__file,number))
+        self.lines_read+=len(lines)
+        return lines
+
+    def __parse_format(self):
+        version,binary,_=self.__next_line().split()
+        if binary!='0': raise ValueError('binary Gmsh file is not supported')
+        if version not in ('2.2','4.1'): raise ValueError(f'unsupported Gmsh version: {version}')
+        self.__version=version
+
+    def __parse_physical_names(self):
+        for _ in range(int(self.__next_line())):
+            dim,tag,name=self.__next_line().split(maxsplit=2)
+            self.__physical_names[(int(dim),int(tag))]=name.strip().strip('"')
+
+    def __parse_entities(self):
+        counts=[int(word) for word in self.__next_line().split()]
+        for dim,count in enumerate(counts):
+            for line in self.__take(count):
+                words=line.split()
+                position=4 if dim==0 else 7
+                number=int(words[position])
+                self.__entity_physicals[(dim,int(words[0]))]=\
+                    [abs(int(tag)) for tag in words[position+1:position+1+number]]
+
+    def __parse_nodes(self):
+        if self.__version=='2.2':
+            data=self.__parse_lines(int(self.__next_line())).reshape(-1,4)
+            return [(data[:,0].astype(np.int64),data[:,1:])]
+        number_blocks=int(self.__next_line().split()[0])
+        chunks=list()
+        for _ in range(number_blocks):
+            number=int(self.__next_line().split()[3])
+            labels=self.__parse_lines(number,np.int64)
+            chunks.append((labels,self.__parse_lines(number).reshape(-1,3)))
+        return chunks
+
+    def __parse_lines(self,number,dtype=np.float64):
+        chunks=list()
+        while number>0:
+            size=min(number,self.chunk_size)
+            chunks.append(self.parse_chunk(self.__take(size),dtype))
+            number-=size
+        return np.concatenate(chunks) if chunks else np.zeros(0,dtype=dtype)
+
+    def __parse_elements(self):
+        """list of (cell type, dim, physical tags, connectivity labels)."""
+        if self.__version=='2.2': return self.__parse_elements_22()
+        number_blocks=int(self.__next_line().split()[0])
+        chunks=list()
+        for _ in range(number_blocks):
+            dim,tag,gmsh_type,number=[int(word) for word in self.__next_line().split()]
+            data=self.__parse_lines(number,np.int64).reshape(number,-1)
+            chunks.append((self.__cell_type(gmsh_type),dim,
+                self.__entity_physicals.get((dim,tag),list()),data[:,1:]))
+        return chunks
+
+    def __parse_elements_22(self):
+        number=int(self.__next_line())
+        groups=dict() #(gmsh type,physical tag):[connectivity]
+        while number>0:
+            size=min(number,self.chunk_size)
+            lines=self.__take(size)
+            number-=size
+            for columns,rows in itertools.groupby(lines,key=lambda line:len(line.split())):
+                data=self.parse_chunk(list(rows),np.int64).reshape(-1,columns)
+                keys=np.stack([data[:,1],data[:,2],np.where(data[:,2]>0,data[:,3],0)],axis=1)
+                for key in np.unique(keys,axis=0):
+                    gmsh_type,number_tags,physical=key.tolist()
+                    selected=np.all(keys==key,axis=1)
+                    groups.setdefault((gmsh_type,physical),list()).append(data[selected,3+number_tags:])
+        dims={1:1,2:2,3:2,4:3,8:1,9:2,15:0}
+        return [(self.__cell_type(gmsh_type),dims.get(gmsh_type,-1),[physical] if physical else list(),
+            np.concatenate(connectivity)) for (gmsh_type,physical),connectivity in groups.items()]
+
+    def __cell_type(self,gmsh_type):
+        return self.CELL_TYPES.get(gmsh_type,f'gmsh{gmsh_type}')
+
+    def __cal_mesh(self,node_chunks,element_chunks):
+        if not node_chunks: raise ValueError('no $Nodes section in mesh file')
+        node_labels=np.concatenate([labels for labels,_ in node_chunks])
+        points=np.concatenate([points for _,points in node_chunks])
+        node_map=self.cal_index_map(node_labels)
+        cells,point_sets,cell_sets=dict(),dict(),dict()
+        for cell_type,dim,physicals,connectivity in element_chunks:
+            connectivity=self.search_index(node_map,connectivity).astype(np.int32)
+            offset=sum(len(block) for block in cells.get(cell_type,list()))
+            cells.setdefault(cell_type,list()).append(connectivity)
+            for physical in physicals:
+                name=self.__physical_names.get((dim,physical),str(physical))
+                point_sets.setdefault(name,list()).append(connectivity.reshape(-1))
+                if cell_type=='triangle':
+                    cell_sets.setdefault(name,list()).append(offset+np.arange(len(connectivity)))
+        cells_dict={cell_type:np.concatenate(blocks) for cell_type,blocks in cells.items()}
+        point_sets={name:np.unique(np.concatenate(nodes)) for name,nodes in point_sets.items()}
+        cell_sets={name:np.concatenate(indexes) for name,indexes in cell_sets.items()}
+        return Mesh(points,cells_dict,point_sets,cell_sets)
+
+
+READERS={
+    '.inp':AbaqusReader,
+    '.msh':GmshReader
+}
+
+def read(filename,chunk_size=65536):
+    """read an Abaqus (.inp) or ASCII Gmsh (.msh) mesh file into a Mesh."""
+    suffix=os.path.splitext(filename)[1].lower()
+    if suffix not in READERS: raise ValueError(f'unknown mesh file format: {suffix}')
+    return READERS[suffix](chunk_size).read(filename)
@@ -22,7 +22,7 @@ VERSION = '0.1.2.1'
 
 # What packages are required for this module to be executed?
 REQUIRED = [
-    'numpy', 'matplotlib', 'meshio', 
+    'numpy', 'scipy', 'matplotlib', 'meshio', 
 ]
 
 # What packages are optional?
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from naivefea import mesh
+from naivefea.constitutive import LinearElastic,OtherMaterial
+
+ROOT=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def data_path(name):
+    """path of a mesh file bundled in the repository."""
+    return os.path.join(ROOT,name)
+
+def read_mesh(name):
+    return mesh.read(data_path(name))
+
+def rectangle_mesh(nx=8,ny=4,length=2.0,height=1.0):
+    """structured triangles of a rectangle, node index i*(nx+1)+j at (x_j,y_i)."""
+    x,y=np.meshgrid(np.linspace(0.0,length,nx+1),np.linspace(0.0,height,ny+1))
+    points=np.stack([x.ravel(),y.ravel()],axis=1)
+    index=np.arange(len(points)).reshape(ny+1,nx+1)
+    a,b,c,d=index[:-1,:-1].ravel(),index[:-1,1:].ravel(),index[1:,1:].ravel(),index[1:,:-1].ravel()
+    elements=np.concatenate([np.stack([a,b,c],axis=1),np.stack([a,c,d],axis=1)])
+    return mesh.Mesh(points,{'triangle':elements})
+
+
+class SoftMaterial(OtherMaterial):
+    """linear elasticity stiffened by the squared strain norm."""
+    def __init__(self,stiffening=5000.0):
+        super().__init__()
+        self.D=LinearElastic(10.0,0.3).D
+        self.stiffening=stiffening
+
+    def cal_stress(self,strain):
+        return self.cal_stress_batch(np.reshape(strain,(1,3)))[0]
+
+    def cal_stress_batch(self,strains):
+        return (strains@self.D.T)*(1.0+self.stiffening*np.sum(strains*strains,axis=1))[:,None]
+
+def enhanced_fea(cls,setup=None,displace=3e-2):
+    """the enhanced.inp plate, nonlinear enhance part, pulled on the right side."""
+    m=read_mesh('enhanced.inp')
+    fea=cls(m)
+    if setup is not None: setup(fea)
+    fea.uniform_material(LinearElastic(10.0,0.3))
+    fea.uniform_material(SoftMaterial(),'enhance')
+    fea.set_deform_conditions('fix',Ux='left')
+    fea.set_deform_conditions('fix',Uy=[5,8])
+    fea.set_displacement('right',Ux=displace)
+    return fea
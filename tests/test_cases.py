@@ -0,0 +1,29 @@
+import numpy as np
+
+from naivefea.analysis import LinearFea
+from naivefea.constitutive import LinearElastic
+from . import rectangle_mesh
+
+
+def cantilever(sparse):
+    fea=LinearFea(rectangle_mesh())
+    fea.set_sparse(sparse)
+    fea.uniform_material(LinearElastic(100.0,0.3))
+    fea.set_displacement(fea.select_nodes(x=0),Ux=0.0,Uy=0.0)
+    fea.set_body_force(by=-1.0)
+    fea.set_edge_traction(lambda x,y:np.isclose(x,2.0),tx=0.5)
+    return fea
+
+def test_submit_cases_matches_submit():
+    for sparse in (False,True):
+        fea=cantilever(sparse)
+        corner=int(fea.select_nodes(x=2.0,y=1.0)[0])
+        cases=[{corner:(0.0,-0.1)},{corner:(0.2,0.0)},{}]
+        deform_cases=fea.submit_cases(cases)
+        for f_given,deform in zip(cases,deform_cases):
+            fea.clear_conditions('F')
+            fea.set_force_conditions(f_given)
+            fea.submit()
+            assert np.allclose(deform,fea.deform)
+        nodal=np.zeros((1,2*len(fea.nodes)))
+        assert np.allclose(fea.submit_cases(nodal)[0],deform_cases[2])
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from naivefea.analysis import OneStepFea
+from . import enhanced_fea
+
+
+@pytest.mark.parametrize('mmap',[True,False])
+def test_checkpoint_round_trip(tmp_path,mmap):
+    fea=enhanced_fea(OneStepFea)
+    fea.set_body_force(bx=0.1)
+    fea.submit()
+    path=str(tmp_path/'enhanced.npz')
+    fea.save(path)
+    loaded=OneStepFea.load(path,mmap=mmap)
+    assert loaded.solved
+    for name in ('nodes','elements','material_index','deform_fixed','deform_given','force_given',
+        'distributed_force','deform','force','strain','stress'):
+        assert np.array_equal(getattr(loaded,name),getattr(fea,name)),name
+    assert loaded.element_sets.keys()==fea.element_sets.keys()
+    assert [type(material) for material in loaded.materials]==[type(material) for material in fea.materials]
+    assert np.array_equal(loaded.current_dict['stress']['Mises'],fea.current_dict['stress']['Mises'])
+    loaded.submit()
+    assert loaded.solved
+    assert np.allclose(loaded.deform,fea.deform,rtol=0.0,atol=1e-10)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from naivefea import mesh
+from naivefea.analysis import LinearFea
+from naivefea.constitutive import LinearElastic
+from . import rectangle_mesh
+
+
+def clamped(m,loads):
+    fea=LinearFea(m)
+    fea.uniform_material(LinearElastic(100.0,0.3))
+    fea.set_deform_conditions('fix',Uxy='fixed')
+    fea.set_force_conditions(loads)
+    return fea
+
+def test_compact_mesh_remaps_nodes_and_conditions():
+    reference=rectangle_mesh()
+    n=len(reference.points)
+    fixed=np.flatnonzero(reference.points[:,0]==0.0)
+    reference.point_sets={'fixed':fixed}
+    loaded=int(np.flatnonzero((reference.points[:,0]==1.0)&(reference.points[:,1]==1.0))[0])
+    expected=clamped(reference,{loaded:(0.0,-1.0)})
+    expected.submit()
+    # a copy of the loaded node used by some of its elements, and a node without element
+    points=np.vstack([reference.points,reference.points[loaded],[[5.0,5.0]]])
+    elements=reference.cells_dict['triangle'].copy()
+    split=np.flatnonzero(np.any(elements==loaded,axis=1))[::2]
+    elements[split]=np.where(elements[split]==loaded,n,elements[split])
+    fea=clamped(mesh.Mesh(points,{'triangle':elements},{'fixed':np.append(fixed,n+1)}),
+        {loaded:(0.0,-0.5),n:(0.0,-0.5)})
+    fea.compact_mesh()
+    assert len(fea.nodes)==n
+    assert np.array_equal(fea.original_index,np.arange(n))
+    assert fea.node_map[n]==loaded and fea.node_map[n+1]==-1
+    assert np.array_equal(fea.node_sets['fixed'],fixed)
+    assert np.allclose(fea.f_given[loaded],(0.0,-1.0))
+    fea.submit()
+    assert np.allclose(fea.deform,expected.deform)
+    original=fea.cal_original_nodal(fea.deform).reshape(-1,2)
+    assert np.array_equal(original[n],original[loaded])
+    assert np.all(np.isnan(original[n+1]))
@@ -0,0 +1,56 @@
+import numpy as np
+
+from naivefea.analysis import LinearFea,OneStepFea
+from naivefea.constitutive import LinearElastic,TensorHookean
+from . import enhanced_fea,rectangle_mesh
+
+
+def pulled_bar(material,load,cls=LinearFea):
+    fea=cls(rectangle_mesh())
+    fea.uniform_material(material)
+    fea.add_node_set('left',x=0.0)
+    fea.set_displacement('left',Ux=0.0)
+    fea.set_displacement(fea.select_nodes(x=0.0,y=0.0),Uy=0.0)
+    load(fea)
+    fea.submit()
+    return fea
+
+def test_reaction_balances_body_force():
+    fea=pulled_bar(LinearElastic(100.0,0.3),lambda fea:fea.set_body_force(bx=1.0))
+    reaction=fea.current_dict['reaction_sum']['left']
+    assert np.allclose(reaction,[-2.0,0.0],atol=1e-10)
+
+def test_reaction_excludes_load_on_fixed_nodes():
+    def load(fea):
+        fea.set_nodal_force(fea.select_nodes(x=2.0),Fx=1.0)
+        fea.set_nodal_force('left',Fx=2.0)
+    fea=pulled_bar(LinearElastic(100.0,0.3),load)
+    assert np.allclose(fea.current_dict['reaction_sum']['left'],[-15.0,0.0],atol=1e-10)
+
+def test_plane_strain_invariants():
+    fea=pulled_bar(LinearElastic(100.0,0.3),lambda fea:fea.set_edge_traction(lambda x,y:x==2.0,tx=2.0))
+    s11=fea.stress[:,0]
+    s33=fea.calculate('S33')
+    assert np.allclose(s33,0.3*(s11+fea.stress[:,1]))
+    s22=fea.stress[:,1]
+    assert np.allclose(fea.calculate('pressure'),-(s11+s22+s33)/3.0)
+    assert np.allclose(fea.calculate('Mises'),np.sqrt(0.5*((s11-s22)**2+(s22-s33)**2+(s33-s11)**2)+3*fea.stress[:,2]**2))
+
+def test_plane_stress_and_tensor_material():
+    material=LinearElastic(100.0,0.3)
+    material.plane_stress=True
+    material.cal_D()
+    fea=pulled_bar(material,lambda fea:fea.set_edge_traction(lambda x,y:x==2.0,tx=2.0))
+    assert np.allclose(fea.calculate('S33'),0.0)
+    assert np.allclose(fea.calculate('Mises'),2.0)
+    fea=pulled_bar(TensorHookean(40.0,80.0),lambda fea:fea.set_edge_traction(lambda x,y:x==2.0,tx=2.0),OneStepFea)
+    e11,e22=fea.strain[:,0],fea.strain[:,1]
+    assert np.allclose(fea.calculate('S33'),(80.0-2.0/3.0*40.0)*(e11+e22))
+
+def test_user_material_invariants_are_finite():
+    fea=enhanced_fea(OneStepFea)
+    fea.submit()
+    soft=fea.element_sets['enhance']
+    assert np.allclose(fea.calculate('S33')[soft],0.0)
+    assert np.all(np.isfinite(fea.calculate('Mises')))
+    assert np.all(np.isfinite(fea.calculate('Tresca')))
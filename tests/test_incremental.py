@@ -0,0 +1,33 @@
+import numpy as np
+
+from naivefea.analysis import OneStepFea
+from . import enhanced_fea
+
+
+def solve(setup=None):
+    fea=enhanced_fea(OneStepFea,setup)
+    fea.submit()
+    assert fea.solved
+    return fea
+
+def test_incremental_matches_full_assembly():
+    full=solve()
+    incremental=solve(lambda fea:fea.set_incremental_assembly())
+    assert np.allclose(incremental.deform,full.deform,rtol=0.0,atol=1e-12)
+    assert np.allclose(incremental.stress,full.stress,rtol=0.0,atol=1e-10)
+    assert len(incremental.iteration_log)==len(full.iteration_log)
+
+def test_linear_elements_are_not_recalculated():
+    fea=solve(lambda fea:fea.set_incremental_assembly())
+    nonlinear=len(fea.get_element_set('enhance'))
+    updated=[log['updated_elements'] for log in fea.iteration_log]
+    assert updated[0]==len(fea.elements)
+    assert all(count<=nonlinear for count in updated[1:])
+
+def test_strain_tol_keeps_exact_residual():
+    full=solve()
+    fea=solve(lambda fea:fea.set_incremental_assembly(strain_tol=1e-4))
+    assert np.allclose(fea.deform,full.deform,rtol=0.0,atol=1e-10)
+    updated=[log['updated_elements'] for log in fea.iteration_log]
+    assert sum(updated)<len(updated)*len(fea.elements)
+    assert updated[-1]==0
@@ -0,0 +1,57 @@
+import numpy as np
+
+from naivefea.analysis import LinearFea
+from naivefea.constitutive import LinearElastic
+from . import rectangle_mesh
+
+
+def bar(reverse_some=False):
+    m=rectangle_mesh()
+    if reverse_some: m.cells_dict['triangle'][::3]=m.cells_dict['triangle'][::3][:,[0,2,1]]
+    fea=LinearFea(m)
+    fea.set_mesh_check(fix_orientation=reverse_some)
+    fea.uniform_material(LinearElastic(100.0,0.0))
+    fea.set_displacement(fea.select_nodes(x=0.0),Ux=0.0)
+    fea.set_displacement(fea.select_nodes(x=0.0,y=0.0),Uy=0.0)
+    return fea
+
+def resultant(fea):
+    return fea.distributed_force.reshape(-1,2).sum(axis=0)
+
+def test_traction_and_body_force_resultants():
+    for reverse_some in (False,True):
+        fea=bar(reverse_some)
+        right=lambda x,y:np.isclose(x,2.0)
+        fea.set_edge_traction(right,tx=2.0,ty=-1.0)
+        assert np.allclose(resultant(fea),(2.0,-1.0))
+        fea.clear_conditions('distributed')
+        fea.set_edge_traction(right,pressure=3.0)
+        assert np.allclose(resultant(fea),(-3.0,0.0))
+        fea.clear_conditions('distributed')
+        fea.set_edge_traction(lambda x,y:np.ones_like(x,dtype=bool),pressure=3.0)
+        assert np.allclose(resultant(fea),0.0)
+        fea.clear_conditions('distributed')
+        fea.set_body_force(bx=0.5,by=-3.0)
+        assert np.allclose(resultant(fea),(0.5*2.0,-3.0*2.0))
+
+def test_uniform_tension():
+    fea=bar(reverse_some=True)
+    fea.set_edge_traction(lambda x,y:np.isclose(x,2.0),tx=2.0)
+    fea.submit()
+    end=fea.select_nodes(x=2.0)
+    assert np.allclose(fea.deform.reshape(-1,2)[end,0],2.0*2.0/100.0)
+    assert np.allclose(fea.stress,[2.0,0.0,0.0],atol=1e-10)
+
+def test_elements_given_by_mask():
+    fea=bar()
+    centroid=fea.nodes[fea.elements].mean(axis=1)
+    left=centroid[:,0]<1.0
+    fea.set_body_force(by=-3.0,element_set=left)
+    assert np.allclose(resultant(fea),(0.0,-3.0))
+    by_indexes=bar()
+    by_indexes.set_body_force(by=-3.0,element_set=np.flatnonzero(left))
+    assert np.array_equal(fea.distributed_force,by_indexes.distributed_force)
+    stiff=LinearElastic(200.0,0.0)
+    fea.uniform_material(stiff,left)
+    assert np.all(fea.material_index[left]==fea.materials.index(stiff))
+    assert np.all(fea.material_index[~left]!=fea.materials.index(stiff))
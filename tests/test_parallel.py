@@ -0,0 +1,25 @@
+import numpy as np
+
+from naivefea.analysis import LinearFea,OneStepFea
+from . import enhanced_fea
+
+
+def test_parallel_matches_serial():
+    for cls in (LinearFea,OneStepFea):
+        serial=enhanced_fea(cls)
+        serial.submit()
+        parallel=enhanced_fea(cls,lambda fea:fea.set_parallel(2))
+        parallel.submit()
+        assert parallel.solved
+        assert np.allclose(parallel.deform,serial.deform,rtol=0.0,atol=1e-12)
+        assert np.allclose(parallel.stress,serial.stress,rtol=0.0,atol=1e-12)
+
+def test_parallel_forward_without_tangent():
+    fea=enhanced_fea(OneStepFea,lambda fea:fea.set_parallel(2))
+    fea.submit()
+    K=fea.K.copy()
+    force=fea.force.copy()
+    fea.zero_global_force()
+    fea.forward(tangent=False)
+    assert np.allclose(fea.force,force)
+    assert np.array_equal(fea.K,K)
@@ -0,0 +1,46 @@
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from naivefea.analysis import LinearFea
+from naivefea.constitutive import LinearElastic
+from . import read_mesh,rectangle_mesh
+
+
+def solved_fea():
+    fea=LinearFea(read_mesh('abaqus_mesh.inp'))
+    fea.uniform_material(LinearElastic(10.0,0.3))
+    fea.set_deform_conditions('fix',Uxy=[0,5,10,15,20])
+    fea.set_force_conditions({14:(0.001,0)})
+    fea.submit()
+    return fea
+
+def test_interactive_plots_return_none():
+    fea=solved_fea()
+    assert fea.plot('stress','S12') is None
+    assert fea.plot_mesh(deformed=True) is None
+    assert fea.plot_restrict() is None
+    assert fea.plot_material() is None
+    plt.close('all')
+
+def test_batch_plots_return_paths(tmp_path):
+    fea=solved_fea()
+    fea.set_plot_options(output=str(tmp_path))
+    paths=[fea.plot('deform','Ux'),fea.plot_mesh(),fea.plot_restrict(),fea.plot_material()]
+    assert [os.path.basename(path) for path in paths]==['fig_Ux.png','fig_mesh.png','fig_restrict.png','fig_material.png']
+    assert all(os.path.getsize(path)>0 for path in paths)
+    assert not plt.get_fignums()
+
+def test_export_shading_by_field_kind(tmp_path):
+    fea=LinearFea(rectangle_mesh(nx=3,ny=2))
+    assert len(fea.nodes)==len(fea.elements)
+    fea.uniform_material(LinearElastic(10.0,0.3))
+    fea.set_displacement(fea.select_nodes(x=0.0),Ux=0.0,Uy=0.0)
+    fea.set_body_force(by=-1.0)
+    fea.submit()
+    get_export_job=fea._PlotProcessor__get_export_job
+    for field,shading in ((('stress','S11'),'flat'),(('strain','e12'),'flat'),(('deform','Uy'),'gouraud'),
+        (('nodal_stress','Mises'),'gouraud')):
+        assert get_export_job(field,str(tmp_path),False,None)['shading']==shading
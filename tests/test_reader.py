@@ -0,0 +1,30 @@
+import numpy as np
+import meshio
+import pytest
+
+from naivefea import mesh
+from naivefea.mesh.mesh import get_mesh_sets
+from . import data_path,rectangle_mesh
+
+
+def assert_same_mesh(m,reference):
+    assert np.allclose(m.points[:,:2],reference.points[:,:2])
+    assert np.array_equal(m.cells_dict['triangle'],reference.cells_dict['triangle'])
+    node_sets,element_sets=get_mesh_sets(m)
+    reference_node_sets,reference_element_sets=get_mesh_sets(reference)
+    assert node_sets.keys()==reference_node_sets.keys()
+    for name,indexes in reference_node_sets.items():
+        assert np.array_equal(np.sort(node_sets[name]),np.sort(indexes))
+    for name,indexes in reference_element_sets.items():
+        assert np.array_equal(np.sort(element_sets[name]),np.sort(indexes))
+
+@pytest.mark.parametrize('name',['abaqus_mesh.inp','enhanced.inp','makeicon.inp'])
+def test_abaqus_matches_meshio(name):
+    path=data_path(name)
+    assert_same_mesh(mesh.AbaqusReader(chunk_size=7).read(path),meshio.read(path))
+
+def test_gmsh_matches_meshio(tmp_path):
+    rectangle=rectangle_mesh()
+    path=str(tmp_path/'rectangle.msh')
+    meshio.write_points_cells(path,rectangle.points,rectangle.cells_dict,file_format='gmsh22',binary=False)
+    assert_same_mesh(mesh.read(path),meshio.read(path))
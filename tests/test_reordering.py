@@ -0,0 +1,34 @@
+import numpy as np
+
+from naivefea.analysis import LinearFea
+from naivefea.constitutive import LinearElastic
+from . import read_mesh
+
+
+def reordered_fea(solver):
+    fea=LinearFea(read_mesh('enhanced.inp'))
+    fea.set_sparse()
+    fea.set_solver(solver)
+    fea.set_reordering('rcm')
+    fea.uniform_material(LinearElastic(10.0,0.3))
+    fea.set_deform_conditions('fix',Uxy='left')
+    fea.set_force_conditions({'right':(0.001,0.0)})
+    fea.submit()
+    return fea
+
+def test_report_uses_active_solver():
+    fea=reordered_fea('lu')
+    report=fea.cal_reordering_report(factorize=True)
+    assert report['bandwidth'][1]<=report['bandwidth'][0]
+    solver=fea.get_solver()
+    free_index=fea.deform_free_index
+    solver.factorize(fea.K[free_index][:,free_index].tocsc())
+    assert report['factor_nnz'][1]==solver.factor_nnz
+    assert reordered_fea('cg').cal_reordering_report(factorize=True)['factor_nnz']==(None,None)
+
+def test_reordering_keeps_solution():
+    fea=reordered_fea('lu')
+    deform=fea.deform.copy()
+    fea.set_reordering(None)
+    fea.submit()
+    assert np.allclose(fea.deform,deform,rtol=0.0,atol=1e-14)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from naivefea.analysis import OneStepFea,IncrementalFea,backend
+from . import enhanced_fea
+
+
+def test_increments_grow_on_nearly_linear_problem():
+    fea=enhanced_fea(IncrementalFea,displace=1e-3)
+    fea.submit()
+    assert fea.solved
+    factors=[log['factor'] for log in fea.step_log]
+    assert factors[-1]==1.0
+    assert len(factors)<10
+    sizes=np.diff([0.0]+factors)
+    assert sizes[1]>sizes[0]
+
+def test_incremental_matches_one_step():
+    one_step=enhanced_fea(OneStepFea)
+    one_step.submit()
+    incremental=enhanced_fea(IncrementalFea)
+    incremental.submit()
+    assert one_step.solved and incremental.solved
+    assert np.allclose(incremental.deform,one_step.deform,rtol=0.0,atol=1e-8)
+
+def test_unconverged_cg_stops_newton():
+    fea=enhanced_fea(OneStepFea)
+    fea.set_solver('cg',maxiter=1)
+    with pytest.warns(RuntimeWarning,match='CG did not converge'):
+        fea.submit()
+    assert not fea.solved
+    assert fea.iteration_log[-1]['solver_converged'] is False
+
+def test_cg_tolerance_keyword_of_old_scipy(monkeypatch):
+    cg=backend.sparse_linalg.cg
+    def old_cg(A,b,x0=None,tol=1e-5,maxiter=None,M=None,callback=None,atol=None):
+        return cg(A,b,x0,rtol=tol,maxiter=maxiter,M=M,callback=callback,atol=atol)
+    monkeypatch.setattr(backend,'CG_TOL','tol')
+    monkeypatch.setattr(backend.sparse_linalg,'cg',old_cg)
+    solver=backend.CGSolver(rtol=1e-12)
+    K=np.array([[4.0,1.0],[1.0,3.0]])
+    solver.factorize(K)
+    assert np.allclose(K@solver.solve(np.array([1.0,2.0])),[1.0,2.0])
+    assert solver.converged